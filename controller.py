@@ -1,19 +1,36 @@
 import json
 import time
+from enum import Enum
 from pathlib import Path
-from threading import Thread, Event
+from threading import Thread, Condition
 import logging
 
 import factory
 from source import ModbusTarget
-from source import PyModbusTcpSource, JsonSource, HslModbusTcpSource
+from source import PyModbusTcpSource, JsonSource, HslModbusTcpSource, AioModbusTcpClient
 from source.list import AddressList
 from pymodbus_context import LinkedSlaveContext
 from model.config import Config
+from scheduler import FixedRateScheduler
+from formula import FormulaX, AffineBatch, HAS_NUMPY
+from write_queue import WriteQueue
 
 __version__ = (1, 3, 3)
 
 
+class CtrlState(Enum):
+    """ModbusController 的生命週期，狀態只會往前推進"""
+    INIT = 0
+    CONNECTED = 1   # mirror.connect_all() 完成，可以開始讀寫
+    READY = 2       # 第一次 Read/WriteContext 完成，可以啟動 server
+    SERVING = 3
+    STOPPING = 4
+    STOPPED = 5
+
+
+_UNSET = object()
+
+
 class ModbusController:
     __version__ = __version__
 
@@ -33,23 +50,50 @@ class ModbusController:
         self.mirror = factory.MIRROR[mirror_mode](
             src_list=AddressList(Path(self.config.address_path), self.logger).to_src_list(),
             logger=self.logger,
+            block_read=bool(self.config.mirror_block_read),
+            block_gap=int(self.config.mirror_block_gap),
         )
-        self.context = LinkedSlaveContext.ServerContext(
-            ctrl=self,
-            zero_mode=True,
-            single_slave_mode=True,
-        )
+        self._CompileFormulas()
+        self._GroupDecoders()
+        # server_changed_only 開啟時記錄各 source 上次寫入 context 的原始 values (id(src) -> tuple)
+        self._last_raw = {} if self.config.server_changed_only else None
+        # 設定 deadband 的 sources 上次寫入 context 的數值 (id(src) -> value)
+        self._last_value = {}
+        self.context_stats = dict(updated=0, skipped=0, deadband=0)
+        # writeback_queue 開啟時，server 的寫入請求排入佇列後即回應，由 WriteQueue 寫回設備
+        self.write_queue = WriteQueue(self.mirror, self.logger) if self.config.writeback_queue else None
+        self._SetContext()
         self.server = factory.SERVER[server_mode](
             host=self.config.server_host,
             port=int(self.config.server_port),
             logger=self.logger,
         )
-        self.server.Setup(self.context, allow_reuse_address=True)
+        if server_mode == 'async' and hasattr(self.mirror, 'loop'):
+            # server 與 AsyncMirror 共用同一個 event loop
+            self.server.Setup(self.context, allow_reuse_address=True, loop=self.mirror.loop)
+        else:
+            self.server.Setup(self.context, allow_reuse_address=True)
 
-        self.__read_request = False
-        self.__runserver_request = False
-        self.__shutdown_request = False
-        self.__shutdownEvent = Event()
+        self._state = CtrlState.INIT
+        self._state_cond = Condition()
+
+    @property
+    def state(self): return self._state
+
+    @property
+    def is_stopping(self): return self._state.value >= CtrlState.STOPPING.value
+
+    def _SetState(self, state):
+        with self._state_cond:
+            if state.value > self._state.value:
+                self._state = state
+                self._state_cond.notify_all()
+
+    def _WaitState(self, state, timeout=None):
+        """等待狀態推進至 state (或之後)，逾時返回 False；
+        以 _WaitState(CtrlState.STOPPING, sec) 取代 time.sleep(sec)，停止時可立即返回"""
+        with self._state_cond:
+            return self._state_cond.wait_for(lambda: self._state.value >= state.value, timeout)
 
     def _SetLogger(self, logger):
         if logger is None:
@@ -72,17 +116,79 @@ class ModbusController:
         ModbusTarget._default_datatype_str = self.config.datatype_str
         ModbusTarget._default_abcd_str = self.config.abcd_str
         ModbusTarget._default_addr_start_from = self.config.addr_start_from
+        ModbusTarget._default_unit_id = int(self.config.server_sid)
 
         PyModbusTcpSource._default_port = int(self.config.source_port)
         PyModbusTcpSource._default_slave_id = int(self.config.source_sid)
 
+        AioModbusTcpClient._default_timeout_sec = float(self.config.mirror_timeout_sec)
+
         HslModbusTcpSource._default_port = int(self.config.source_port)
         HslModbusTcpSource._default_slave_id = int(self.config.source_sid)
+        HslModbusTcpSource._default_timeout_sec = float(self.config.mirror_timeout_sec)
+        HslModbusTcpSource._default_pipeline_depth = int(self.config.hsl_pipeline_depth)
 
         JsonSource._default_folder = Path(self.config.register_folder)
 
+    def _SetContext(self):
+        """address.csv 的 TargetUnitID 皆為預設 (server_sid) 時維持 single slave mode，任何 unit id 皆可讀寫；
+        否則每個 unit id 各自一個 slave context，未設定的 unit id 不回應
+        """
+        address_index = self.mirror.src_list.address_index
+        unit_ids = address_index.unit_ids or [self._server_sid]
+        # server_sparse 開啟時，server 只配置 address.csv 中 target 使用的位址區段
+        self.context = LinkedSlaveContext.ServerContext(
+            ctrl=self,
+            zero_mode=True,
+            single_slave_mode=unit_ids == [self._server_sid],
+            unit_ids=unit_ids,
+            segments=address_index.Segments(int(self.config.server_sparse_gap)) if self.config.server_sparse else None,
+            unmapped_error=self.config.server_unmapped_error,
+        )
+        self._slave_contexts = {unit_id: self.context[unit_id] for unit_id in unit_ids}
+
+    def _CompileFormulas(self):
+        """載入時將各 source 的 FormulaX 編譯一次，不合法的公式視為未設定 (直接輸出 X)；
+        formula_vectorize 開啟且有 numpy 時，輸出為 float 的線性公式改由 AffineBatch 一次計算"""
+        self._formulas = {}
+        for src in self.mirror.src_list:
+            if src.formula_x_str:
+                try:
+                    self._formulas[id(src)] = FormulaX.Compile(src.formula_x_str)
+                except Exception as e:
+                    self.logger.warning(f'Invalid formula: {src} {e}')
+
+        self._vectorized = set()
+        if self.config.formula_vectorize and HAS_NUMPY:
+            self._vectorized = {
+                id(src) for src in self.mirror.src_list
+                if id(src) in self._formulas
+                and self._formulas[id(src)].is_affine
+                and src.dataType.basic_type_str in ['int', 'uint', 'float']
+                and src.target.dataType.basic_type_str == 'float'
+            }
+            if self._vectorized:
+                self.logger.info(f'Vectorized formulas: {len(self._vectorized)}/{len(self._formulas)}')
+
+    def _GroupDecoders(self):
+        """依 source dataType 的 codec_key 分組，WriteContext 每組以一次 DecodeMany 解碼；
+        線性公式的 sources 再依 target dataType 分組，整組以 AffineBatch 計算並以一次 EncodeMany 編碼
+        Return (self._decode_groups): [(dataType, sources, AffineBatch | None), ...]
+        """
+        groups = {}
+        for src in self.mirror.src_list:
+            batched = id(src) in self._vectorized
+            key = (src.dataType.codec_key, src.target.dataType.codec_key if batched else None)
+            if key not in groups:
+                groups[key] = (src.dataType, [], batched)
+            groups[key][1].append(src)
+
+        self._decode_groups = [
+            (dataType, group, AffineBatch(group, [self._formulas[id(src)] for src in group]) if batched else None)
+            for dataType, group, batched in groups.values()
+        ]
+
     def Start(self):
-        self.__runserver_request = False
         # mirror_thread = Thread(target=self.UpdateLoop, name='CtrlMirror')
         # mirror_thread.start()
         connect_thread = Thread(target=self._connect_loop, name='CtrlConnect')
@@ -95,21 +201,14 @@ class ModbusController:
         read_recover_thread.start()
 
         try:
-            while not self.__runserver_request:
-                pass
-        finally:
-            self.__runserver_request = False
-            self.server.Start(name='CtrlServer')
+            self._WaitState(CtrlState.READY)
+            if not self.is_stopping:
+                self.server.Start(name='CtrlServer')
+                self._SetState(CtrlState.SERVING)
 
-        # shutdown_thread = Thread(target=self.Stop, name='CtrlShutdown')
-        # shutdown_thread.start()
-        self.__shutdownEvent.clear()
-        try:
-            while not self.__shutdown_request:
-                pass
+            self._WaitState(CtrlState.STOPPING)
         finally:
-            self.__shutdown_request = False
-            self.__shutdownEvent.set()
+            self._SetState(CtrlState.STOPPED)
 
     def Stop(self):
         for i in range(int(self.config.shutdown_delay_sec)):
@@ -117,41 +216,52 @@ class ModbusController:
             time.sleep(1)
             print(f'<{left_sec}>')
 
-        self.server.Stop()
+        if self._state is CtrlState.SERVING:
+            self.server.Stop()
+        if self.write_queue is not None:
+            self.write_queue.Close(wait=True)
         self.logger.info('Ctrl closing...')
-        self.__shutdown_request = True
-        self.__shutdownEvent.wait()
+        self._SetState(CtrlState.STOPPING)
+        self._WaitState(CtrlState.STOPPED)
         self.logger.info('Ctrl is closed completely.')
 
     def _connect_loop(self):
         try:
             self.mirror.connect_all()
-            self.__read_request = True
+            self._SetState(CtrlState.CONNECTED)
         except Exception as e:
             self.logger.error(f'(Connect-Loop) error: {e}')
             self.Stop()
 
-        while True:
-            time.sleep(int(self.config.mirror_retry_sec))
+        while not self._WaitState(CtrlState.STOPPING, timeout=int(self.config.mirror_retry_sec)):
             try:
                 self.mirror.connect_retry()
+                if self.write_queue is not None:
+                    self.logger.info(f'(Write-Queue) {self.write_queue.stats}')
+                self.logger.info(f'(Context) last cycle {self.context_stats}')
             except Exception as e:
                 self.logger.error(f'(Retry-Loop) error: {e}')
 
     def _readwrite_loop(self):
-        while not self.__read_request:
-            pass
+        self._WaitState(CtrlState.CONNECTED)
 
         _tag = True
         _times = []
-        while True:
+        scheduler = FixedRateScheduler(float(self.config.mirror_refresh_sec))
+        while not self.is_stopping:
             try:
                 self.mirror.Read()
                 self.WriteContext()
-                time.sleep(float(self.config.mirror_refresh_sec))
+                if self._WaitState(CtrlState.STOPPING, timeout=scheduler.Next()):
+                    break
+                if scheduler.is_overrun and scheduler.overrun_count % 100 == 1:
+                    self.logger.warning(
+                        f"(Readwrite-Loop) overrun {scheduler.last_overrun_sec:.3f} sec "
+                        f"(period={scheduler.period_sec} sec, total overrun={scheduler.overrun_count})"
+                    )
                 if _tag:
                     _tag = False
-                    self.__runserver_request = True
+                    self._SetState(CtrlState.READY)
 
                 if self.verbose:
                     _times.append(time.time())
@@ -166,57 +276,135 @@ class ModbusController:
             except Exception as e:
                 self.logger.error(f"(Readwrite-Loop) error: {e}")
                 self.logger.info('(Radwrite-Loop) pausing...')
-                time.sleep(int(self.config.readwrite_retry_sec))
+                self._WaitState(CtrlState.STOPPING, timeout=int(self.config.readwrite_retry_sec))
+                scheduler.Reset()
                 self.logger.info('(Radwrite-Loop) resumed')
 
     def _readfail_recover_loop(self):
-        while True:
+        while not self.is_stopping:
             self.logger.debug('(Readfail-Recover-Loop) recovering...')
             try:
                 self.mirror.readfail_recover()
             except Exception as e:
                 self.logger.error(f"(Readfail-Recover-Loop) error: {e}")
             finally:
-                time.sleep(int(self.config.readwrite_retry_sec))
+                self._WaitState(CtrlState.STOPPING, timeout=int(self.config.readwrite_retry_sec))
 
     def WriteContext(self):
-        for src in self.mirror.src_list:
-            new_val = src.values
-            if new_val is None:
-                new_val = src.dataType.Encode(self.config.server_null_value)
-
-            else:
-                _encoded = src.dataType.Decode(new_val)
-                if src.formula_x_str:
+        """將本週期的數值寫入 server context 的快照，全部完成後一次發佈"""
+        for slave_context in self._slave_contexts.values():
+            slave_context.BeginSnapshot()
+        self._StageContext()
+        for slave_context in self._slave_contexts.values():
+            slave_context.PublishSnapshot()
+
+    def _Changed(self, src):
+        """src 的原始 values 與上次寫入 context 時不同 (或尚未寫入過) 時返回 True"""
+        if self._last_raw is None:
+            return True
+        raw = None if src.values is None else tuple(src.values)
+        if self._last_raw.get(id(src), _UNSET) == raw:
+            return False
+        self._last_raw[id(src)] = raw
+        return True
+
+    def _InDeadband(self, src, value):
+        """數值相對上次寫入 context 的變動未超過 src 的 deadband 時返回 True"""
+        if src.deadband is None and src.deadband_pct is None:
+            return False
+        last = self._last_value.get(id(src))
+        if last is None or isinstance(value, bool) or not isinstance(value, (int, float)):
+            return False
+        threshold = max(src.deadband or 0., abs(last) * (src.deadband_pct or 0.) / 100)
+        return abs(value - last) <= threshold
+
+    def _StageValue(self, src, value, encoded=None):
+        """value 在 deadband 內時不寫入 (快照中保留上次的數值)，返回是否已寫入；
+        encoded 為已編碼的 target values (批次編碼時)，None 時以 target dataType 編碼"""
+        if src.deadband is not None or src.deadband_pct is not None:
+            if self._InDeadband(src, value):
+                return False
+            self._last_value[id(src)] = value
+        self._SetContextValues(src, src.target.dataType.Encode(value) if encoded is None else encoded)
+        return True
+
+    def _StageContext(self):
+        """只處理原始 values 有變動的 sources；未變動或在 deadband 內者沿用快照中 (由 BeginSnapshot 複製) 的數值"""
+        updated = skipped = deadband = 0
+        for dataType, group, batch in self._decode_groups:
+            rows = []
+            flat = []
+            offsets = []
+            for i, src in enumerate(group):
+                if not self._Changed(src):
+                    skipped += 1
+                    continue
+
+                updated += 1
+                if src.values is None:
+                    self._last_value.pop(id(src), None)
+                    self._SetContextValues(src, src.dataType.Encode(self.config.server_null_value))
+                else:
+                    rows.append(i)
+                    offsets.append(len(flat))
+                    flat.extend(src.values)
+            if not rows:
+                continue
+
+            # 各 source 長度皆相同時以連續排列解碼 (iter_unpack)
+            if len(flat) == len(rows) * dataType.length:
+                offsets = None
+            decoded = dataType.DecodeMany(flat, offsets)
+
+            if batch is not None:
+                deadband += self._StageBatch(batch, decoded, rows)
+                continue
+
+            for i, _encoded in zip(rows, decoded):
+                src = group[i]
+                formula = self._formulas.get(id(src))
+                if formula:
                     try:
-                        # 驗證公式的合法性
-                        if not all(chr_ in factory.FORMULA_X_VALIABLE_CHRS for chr_ in src.formula_x_str):
-                            raise ValueError(
-                                f'Invalid formula_x_str: {src.formula_x_str}')
-
-                        _formulated = eval(
-                            src.formula_x_str.replace(
-                                'x', '{x}'
-                            ).replace(
-                                'X', '{x}'
-                            ).format(x=_encoded)
-                        )
+                        _formulated = formula(_encoded)
                     except Exception as e:
                         self.logger.warning(f'Invalid formula: {e}')
                         _formulated = _encoded
                 else:
                     _formulated = _encoded
-                new_val = src.target.dataType.Encode(_formulated)
-
-            self.server.context[0x00].setValues(
-                fx=src.target.pointType.fx,
-                address=src.target.address_from0,
-                values=new_val,
-                writeback=False,
-            )
+                if not self._StageValue(src, _formulated):
+                    deadband += 1
+
+        self.context_stats = dict(updated=updated - deadband, skipped=skipped, deadband=deadband)
+
+    def _StageBatch(self, batch, decoded, rows):
+        """整組計算線性公式並一次編碼後，依序切片寫入各 source 的 target，返回 deadband 內的數量"""
+        results = batch.Apply(decoded, None if len(rows) == len(batch) else rows)
+        dataType = batch.sources[0].target.dataType
+        encoded = dataType.EncodeMany(results)
+        length = dataType.length
+        deadband = 0
+        for j, (i, value) in enumerate(zip(rows, results)):
+            if not self._StageValue(batch.sources[i], value, encoded[j * length:(j + 1) * length]):
+                deadband += 1
+        return deadband
+
+    def _SetContextValues(self, src, values):
+        self._slave_contexts[src.target.unit_id].Stage(
+            fx=src.target.pointType.fx,
+            address=src.target.address_from0,
+            values=values,
+        )
 
-    def WriteMirror(self, fx, address, values):
-        self.mirror.Write(fx, address, values)
+    def WriteMirror(self, fx, address, values, unit_id=0x00):
+        # client 寫入的數值已進入 context；寫回失敗時 source 的 values 不變，
+        # 因此清除變動與 deadband 紀錄，下個週期重新寫入全部 sources 以覆蓋 context
+        if self._last_raw is not None:
+            self._last_raw.clear()
+        self._last_value.clear()
+        if self.write_queue is not None:
+            self.write_queue.Put(fx, address, values, unit_id)
+        else:
+            self.mirror.Write(fx, address, values, unit_id)
 
 
 class MetaSingleton(type):
@@ -0,0 +1,29 @@
+class CycleStats:
+    """耗時統計 (秒)：mirror 的讀取週期、WriteQueue 的寫入延遲"""
+    def __init__(self):
+        self.count = 0
+        self.last_sec = 0.
+        self.max_sec = 0.
+        self.total_sec = 0.
+
+    def __repr__(self):
+        return f'<{__class__.__name__} n={self.count} last={self.last_sec:.3f} avg={self.avg_sec:.3f} max={self.max_sec:.3f}>'
+
+    @property
+    def avg_sec(self):
+        return self.total_sec / self.count if self.count else 0.
+
+    def update(self, sec):
+        self.count += 1
+        self.last_sec = sec
+        self.total_sec += sec
+        self.max_sec = max(self.max_sec, sec)
+
+    @property
+    def dict(self):
+        return dict(
+            count=self.count,
+            last_sec=round(self.last_sec, 3),
+            avg_sec=round(self.avg_sec, 3),
+            max_sec=round(self.max_sec, 3),
+        )
@@ -1,18 +1,20 @@
-from server import SyncTcpServer
+from server import SyncTcpServer, AsyncTcpServer
 from mirror_sync import SyncMirror
+from mirror_thread import ThreadMirror
+from mirror_async import AsyncMirror
 
 
 SERVER = {
     # 'sync': SyncServer,
     'sync-tcp': SyncTcpServer,
-    'async': 0,
+    'async': AsyncTcpServer,
 }
 DEFAULT_SERVER_MODE = 'sync-tcp'
 
 MIRROR = {
     'sync': SyncMirror,
-    'sync-thread': 0,
-    'async': 0
+    'sync-thread': ThreadMirror,
+    'async': AsyncMirror,
 }
 DEFAULT_MIRROR_MODE = 'sync'
 
@@ -0,0 +1,98 @@
+import ast
+from functools import lru_cache
+
+from factory import FORMULA_X_VALIABLE_CHRS
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+HAS_NUMPY = np is not None
+
+
+class FormulaX:
+    """FormulaX 公式 (例如 3.14*X、X/10+2)：
+    載入時驗證字元並編譯成 lambda 一次，之後每個週期只需呼叫 formula(x)
+    """
+    def __init__(self, formula_str: str):
+        # 驗證公式的合法性
+        if not all(chr_ in FORMULA_X_VALIABLE_CHRS for chr_ in formula_str):
+            raise ValueError(f'Invalid formula_x_str: {formula_str}')
+
+        self.formula_str = formula_str
+        self.expr = formula_str.replace('X', 'x')
+        self._func = eval(f'lambda x: {self.expr}', {'__builtins__': {}})
+        self.affine = _Affine(ast.parse(self.expr, mode='eval').body)
+
+    def __repr__(self): return f'<{__class__.__name__}: {self.formula_str}>'
+
+    def __call__(self, x): return self._func(x)
+
+    @property
+    def is_affine(self): return self.affine is not None
+
+    @classmethod
+    @lru_cache(maxsize=None)
+    def Compile(cls, formula_str: str):
+        """相同的公式字串共用同一個編譯結果"""
+        return cls(formula_str)
+
+
+def _Affine(node):
+    """node 為 x 的線性函數時返回係數 (a, b)，代表 a*x+b；否則返回 None"""
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+        return 0., float(node.value)
+
+    if isinstance(node, ast.Name) and node.id == 'x':
+        return 1., 0.
+
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.UAdd, ast.USub)):
+        operand = _Affine(node.operand)
+        if operand is None:
+            return None
+        sign = -1. if isinstance(node.op, ast.USub) else 1.
+        return sign * operand[0], sign * operand[1]
+
+    if isinstance(node, ast.BinOp):
+        left, right = _Affine(node.left), _Affine(node.right)
+        if left is None or right is None:
+            return None
+
+        (a1, b1), (a2, b2) = left, right
+        if isinstance(node.op, ast.Add):
+            return a1 + a2, b1 + b2
+        if isinstance(node.op, ast.Sub):
+            return a1 - a2, b1 - b2
+        if isinstance(node.op, ast.Mult):
+            # 僅一側含有 x 時仍為線性
+            if a1 == 0.:
+                return b1 * a2, b1 * b2
+            if a2 == 0.:
+                return a1 * b2, b1 * b2
+        if isinstance(node.op, ast.Div) and a2 == 0. and b2 != 0.:
+            return a1 / b2, b1 / b2
+
+    return None
+
+
+class AffineBatch:
+    """將多個線性公式的係數打包成陣列，每個週期以一次 NumPy 運算完成 a*X+b
+        - Apply(x, rows): x 為 DecodeMany 的結果 (list)，rows 為其對應 sources 的索引 (None 表示全部)，
+          返回計算結果 (list of float)，順序同 x
+    """
+    def __init__(self, sources, formulas):
+        assert np is not None, 'AffineBatch requires numpy'
+        self.sources = list(sources)
+        self.a = np.array([formula.affine[0] for formula in formulas], dtype=float)
+        self.b = np.array([formula.affine[1] for formula in formulas], dtype=float)
+
+    def __repr__(self): return f'<{__class__.__name__} *{len(self)}>'
+    def __len__(self): return len(self.sources)
+
+    def Apply(self, x, rows=None):
+        if rows is None:
+            a, b = self.a, self.b
+        else:
+            a, b = self.a[rows], self.b[rows]
+        return (np.array(x, dtype=float) * a + b).tolist()
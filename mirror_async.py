@@ -0,0 +1,171 @@
+import asyncio
+from threading import Thread, get_ident
+
+from mirror_sync import SyncMirror
+from source import PyModbusTcpSource, AioModbusTcpClient
+from source.status import SourceStatus
+
+
+class AsyncMirror(SyncMirror):
+    """以 asyncio 同時輪詢所有 sources：
+        - PyModbusTcpSource 改由 AioModbusTcpClient (non-blocking、逾時可控) 讀寫
+        - 其他 source 於 executor 中執行原本的同步讀寫
+    event loop 於獨立 thread 執行，AsyncTcpServer 可共用 self.loop
+    """
+    def __init__(self, src_list, logger, **kwargs) -> None:
+        self.loop = asyncio.new_event_loop()
+        self._loop_thread = Thread(target=self.loop.run_forever, name='MirrorLoop', daemon=True)
+        self._loop_thread.start()
+        self._aio_clients = {}
+        super().__init__(src_list, logger, **kwargs)
+
+    def _Run(self, coro):
+        """於 mirror 的 event loop 執行 coroutine 並等待結果；
+        若呼叫端本身就在 loop 內 (例如 AsyncTcpServer 的寫入)，則僅排程、不等待
+        """
+        if get_ident() == self._loop_thread.ident:
+            return self.loop.create_task(coro)
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def _AioClient(self, src):
+        if not isinstance(src, PyModbusTcpSource):
+            return None
+
+        key = (src.client.ip, src.client.port)
+        if key not in self._aio_clients:
+            self._aio_clients[key] = AioModbusTcpClient(*key)
+        return self._aio_clients[key]
+
+    def connect_all(self):
+        self._Run(self._ConnectAll(self.src_list.wait_connect))
+        self.log_status()
+
+    def connect_retry(self):
+        self.logger.info('(Retry-Loop) Checking connection status...')
+        self._Run(self._ConnectAll(self.src_list.wait_retry, retry=True))
+        for src in self.src_list.retry_failed:
+            self.src_list.set_status(src, SourceStatus.CONNECTED_FAILED)
+
+        self.log_status()
+
+    async def _ConnectAll(self, src_list, retry=False):
+        # 共用同一個 client 的 sources 只需連線一次
+        firsts = {}
+        for src in src_list:
+            client = self._AioClient(src) or src.client
+            firsts.setdefault(id(client), src)
+        await asyncio.gather(*(self._ConnectOne(src, retry) for src in firsts.values()))
+
+    async def _ConnectOne(self, src, retry=False):
+        client = self._AioClient(src)
+        try:
+            if client is None:
+                res,info = await self.loop.run_in_executor(None, src.Connect)
+            else:
+                res,info = await client.Connect()
+        except Exception as e:
+            self.logger.error(f'Connect failed {src} \n{e}')
+            res,info = 0,None
+
+        self._SetConnectResult(src, res, info, retry=retry)
+
+    def Disconnect(self):
+        for client in self._aio_clients.values():
+            self._Run(client.Disconnect())
+        super().Disconnect()
+
+    def Read(self):
+        self._Run(self._ReadAll(self._DueBlocks()))
+
+    async def _ReadAll(self, blocks):
+        await asyncio.gather(*(self._ReadBlockAsync(block) for block in blocks))
+
+    async def _ReadBlockAsync(self, block):
+        head = block.sources[0]
+        client = self._AioClient(head)
+        if client is None:
+            await self.loop.run_in_executor(None, self._ReadBlock, block)
+            return
+
+        req,val = await client.Read(head.pointType, block.start, block.count, head.slave_id)
+        if req:
+            for src in block:
+                src.SetBlockValues(val, src.address_from0 - block.start)
+                self._SetReadOK(src)
+
+        elif len(block) > 1:
+            self.logger.debug(f'Block read failed {block} {val}')
+            await asyncio.gather(*(self._ReadOneAsync(client, src) for src in block))
+
+        else:
+            self._SetReadFailed(head, val)
+
+    async def _ReadOneAsync(self, client, src):
+        req,val = await client.Read(src.pointType, src.address_from0, len(src), src.slave_id)
+        if req:
+            src.SetBlockValues(val, 0)
+            self._SetReadOK(src)
+        else:
+            self._SetReadFailed(src, val)
+
+    def _SetReadFailed(self, src, err):
+        src.values = None
+        self.logger.error(f'Read failed {src} {err}')
+        self.src_list.set_read_failed(src)
+
+    def Write(self, fx, address, values, unit_id=0x00):
+        return self._Run(self._WriteAsync(fx, address, values, unit_id))
+
+    async def _WriteAsync(self, fx, address, values, unit_id=0x00):
+        written = []
+        for block in self._WritePlan(fx, address, values, unit_id):
+            if not await self._WriteBlockAsync(block, written):
+                await self._RollbackAsync(written)
+                return 0
+        return 1
+
+    async def _WriteBlockAsync(self, block, written):
+        head = block.sources[0]
+        client = self._AioClient(head)
+        if client is None:
+            return await self.loop.run_in_executor(None, self._WriteBlock, block, written)
+
+        original_vals = [src.values for src in block.sources]
+        if len(block) > 1:
+            req,err = await client.Write(block.values, head.pointType, block.start, head.slave_id)
+            if req:
+                for (src, values), original_val in zip(block, original_vals):
+                    src.values = values[:len(src)]
+                    self._SetWriteResult(src, original_val, req, err)
+                    written.append((src, original_val))
+                return req
+            self.logger.debug(f'Block write failed {block} {err}')
+
+        for (src, values), original_val in zip(block, original_vals):
+            req,err = await self._WriteOneAsync(src, values)
+            if not self._SetWriteResult(src, original_val, req, err):
+                return 0
+            written.append((src, original_val))
+        return 1
+
+    async def _RollbackAsync(self, written):
+        for src, original_val in reversed(written):
+            if original_val is None:
+                self.logger.warning(f'Rollback skipped (no original value) {src}')
+                continue
+            req,err = await self._WriteOneAsync(src, original_val)
+            self._SetRollbackResult(src, original_val, req, err)
+
+    async def _WriteOneAsync(self, src, values):
+        client = self._AioClient(src)
+        if client is None:
+            return await self.loop.run_in_executor(None, src.Write, values)
+
+        if not src.is_writable:
+            return 0, Exception('SourceNotWriable')
+        # 同 PyModbusTcpSource.Write，只寫入設備端長度 len(src)
+        values = values[:len(src)]
+        req,info = await client.Write(values, src.pointType, src.address_from0, src.slave_id)
+        if req:
+            src.values = values
+        return req, info
@@ -1,13 +1,18 @@
-from time import time
-from source import MirrorSourceList
+from time import time, monotonic
+from source import MirrorSourceList, ReadPlanner, ReadBlock, WriteBlock, AddressIndex
 from source.status import SourceStatus
 
 class SyncMirror():
-    def __init__(self, src_list, logger) -> None:
+    def __init__(self, src_list, logger, block_read=True, block_gap=0) -> None:
         self.logger = logger
+        self.planner = ReadPlanner(max_gap=block_gap, enabled=block_read)
+        self._last_read = None
         self.src_list = MirrorSourceList(mirror=self)
+        # 載入時先一次回報全部的位址衝突，衝突的 sources 不加入
+        rejected = {id(src) for src, _ in self.ValidateAll(src_list)}
         for src in src_list:
-            self.src_list.append(src)
+            if id(src) not in rejected:
+                self.src_list.append(src)
 
     def log_status(self):
         self.logger.info(f'Mirroring from {len(self.src_list.client_list)} clients / {len(self.src_list)} sources')
@@ -15,57 +20,69 @@ class SyncMirror():
         client_summary, mixed_list = self.src_list.status
         self.logger.info(f'\tby client {client_summary}')
         self.logger.info(f'\tby source {dict(self.src_list.counter)}')
+        if len(self.src_list.poll_groups) > 1:
+            self.logger.info(f'\tpoll groups {list(self.src_list.poll_groups.values())}')
         if mixed_list:
             self.logger.info(f'\tmixed detail: {mixed_list}')
 
     def _Validate(self, new_src):
-        for src in self.src_list:
-            if src.target.pointType.type_str != new_src.target.pointType.type_str: continue
-            if src.target.address_set.intersection(new_src.target.address_set):
-                self.logger.warning(f'Address conflict!! src={src} / new_src={new_src}')
-                return -1
+        src = self.src_list.address_index.Conflict(new_src.target)
+        if src is not None:
+            self.logger.warning(f'Address conflict!! src={src} / new_src={new_src}')
+            return -1
+
+    def ValidateAll(self, src_list) -> list:
+        """一次檢查 src_list 內所有的位址衝突 (不加入 mirror)，返回 [(src, conflicted_src), ...]"""
+        conflicts = AddressIndex.FindConflicts(src_list)
+        for src, conflicted_src in conflicts:
+            self.logger.warning(f'Address conflict!! src={conflicted_src} / new_src={src}')
+        if conflicts:
+            self.logger.warning(f'{len(conflicts)} sources rejected for address conflicts')
+        return conflicts
 
     def connect_all(self):
-        while self.src_list.wait_connect:
-            src = self.src_list.wait_connect[0]
-            self._connect_one(src)
+        # 共用 client 的 sources 會一併更新狀態，已非 wait_connect 者略過
+        for src in self.src_list.wait_connect:
+            if src.status.wait_connect:
+                self._connect_one(src)
 
         self.log_status()
 
     def connect_retry(self):
         self.logger.info('(Retry-Loop) Checking connection status...')
-        while self.src_list.wait_retry:
-            src = self.src_list.wait_retry[0]
-            self._connect_one(src, retry=True)
+        for src in self.src_list.wait_retry:
+            if src.status == SourceStatus.CONNECTED_FAILED:
+                self._connect_one(src, retry=True)
 
         for src in self.src_list.retry_failed:
-            src.status = SourceStatus.CONNECTED_FAILED
+            self.src_list.set_status(src, SourceStatus.CONNECTED_FAILED)
 
         self.log_status()
 
     def _connect_one(self, src, retry=False):
-        failed = False
         try:
             res,info = src.Connect()
-            if res:
-                self.src_list.set_connected(src)
-                if info:
-                    self.logger.debug(' / '.join([f'connected to {src} OK'] + info))
-                else:
-                    self.logger.info(f'connected to {src} OK')
-            else:
-                self.logger.warning(f'...not connected : {src} / {info}')
-                failed = True
-
         except Exception as e:
             self.logger.error(f'Connect failed {src} \n{e}')
-            failed = True
+            res,info = 0,None
+
+        self._SetConnectResult(src, res, info, retry=retry)
 
-        if failed:
-            if retry:
-                self.src_list.set_retry_failed(src)
+    def _SetConnectResult(self, src, res, info, retry=False):
+        if res:
+            self.src_list.set_connected(src)
+            if info:
+                self.logger.debug(' / '.join([f'connected to {src} OK'] + info))
             else:
-                self.src_list.set_connect_failed(src)
+                self.logger.info(f'connected to {src} OK')
+            return
+
+        if info is not None:
+            self.logger.warning(f'...not connected : {src} / {info}')
+        if retry:
+            self.src_list.set_retry_failed(src)
+        else:
+            self.src_list.set_connect_failed(src)
 
     def Disconnect(self):
         for src in self.src_list:
@@ -80,78 +97,196 @@ class SyncMirror():
         except:
             pass
 
+    def _DueBlocks(self):
+        """已到期的輪詢群組 (依 priority 由高到低) 各自規劃出的讀取區塊；
+        到期判斷以 Read 間隔的一半為容許值，取最接近的一次 Read 執行"""
+        now = monotonic()
+        half_tick = (now - self._last_read) / 2 if self._last_read else 0.
+        self._last_read = now
+
+        blocks = []
+        for group in self.src_list.due_poll_groups(now, tolerance=half_tick):
+            blocks.extend(self.planner.Plan([src for src in group if src.status.wait_read]))
+        return blocks
+
     def Read(self):
-        debug_msg_interval_sec = 60
-        for src in self.src_list.wait_read:
-            try:
-                req,val = src.Read()
-                if req:
-                    self.src_list.set_reading(src)
-                    if time() % debug_msg_interval_sec < 1:
-                        self.logger.debug(f'{src} val = {val}')
+        for blocks in self._PipelineGroups(self._DueBlocks()):
+            self._ReadBlocks(blocks)
 
-                else:
-                    self.logger.error(f'Read failed {src} {val}')
-                    self.src_list.set_read_failed(src)
+    @staticmethod
+    def _PipelineGroups(blocks):
+        """依 pipeline_key 分組 (保持原順序)，無 pipeline_key 的區塊各自一組"""
+        groups = {}
+        for block in blocks:
+            key = getattr(block.sources[0], 'pipeline_key', None) or id(block)
+            groups.setdefault(key, []).append(block)
+        return list(groups.values())
 
-            except Exception as e:
-                self.logger.error(f'Read failed {src} \n{e}')
+    def _ReadBlocks(self, blocks):
+        """同一設備的多個區塊以流水線一次讀取，失敗的區塊再改走 _ReadBlock"""
+        if len(blocks) == 1:
+            self._ReadBlock(blocks[0])
+            return
+
+        try:
+            results = ReadBlock.ReadPipelined(blocks)
+        except Exception as e:
+            results = [(0, e)] * len(blocks)
+
+        for block, (req, val) in zip(blocks, results):
+            if req:
+                for src in block:
+                    self._SetReadOK(src)
+            else:
+                self.logger.debug(f'Pipelined read failed {block} {val}')
+                self._ReadBlock(block)
+
+    def _ReadBlock(self, block):
+        """區塊讀取失敗時，改為逐一讀取區塊內的 src，避免單一位址錯誤拖累整個區塊"""
+        if len(block) == 1:
+            self._ReadOne(block.sources[0])
+            return
+
+        try:
+            req,val = block.Read()
+        except Exception as e:
+            req,val = 0,e
+
+        if req:
+            for src in block:
+                self._SetReadOK(src)
+        else:
+            self.logger.debug(f'Block read failed {block} {val}')
+            for src in block:
+                self._ReadOne(src)
+
+    def _ReadOne(self, src):
+        try:
+            req,val = src.Read()
+            if req:
+                self._SetReadOK(src)
+            else:
+                self.logger.error(f'Read failed {src} {val}')
                 self.src_list.set_read_failed(src)
 
+        except Exception as e:
+            self.logger.error(f'Read failed {src} \n{e}')
+            self.src_list.set_read_failed(src)
+
+    def _SetReadOK(self, src):
+        debug_msg_interval_sec = 60
+        self.src_list.set_reading(src)
+        if time() % debug_msg_interval_sec < 1:
+            self.logger.debug(f'{src} val = {src.values}')
+
     def readfail_recover(self):
         for src in self.src_list.read_failed:
             self.src_list.set_readfail_recover(src)
             self.logger.info(f'Readfail recover {src}')
 
-    def _MatchSourceList(self, fx, address):
-        matched_list = []
-        for src in self.src_list:
-            if address == src.target.address_from0 and fx in src.target.pointType.write_fx:
-                matched_list.append(src)
+    def _MatchSourceList(self, fx, address, unit_id=0x00):
+        return self.src_list.write_routes.get((unit_id, fx, address), [])
 
-        return matched_list
+    def _WriteRequestList(self, fx, address, values, unit_id=0x00):
+        """依序找出寫入範圍 address ~ address+len(values) 內的 sources，
+        遇到長度不符、重複或找不到對應的 source 時停止，返回已匹配的部分"""
+        req_list = []
+        remain = len(values)
+        while True:
+            matched_src_list = self._MatchSourceList(fx, address, unit_id)
+            if len(matched_src_list) == 1:
+                src = matched_src_list[0]
+                if remain < src.length:
+                    self.logger.warning(f'Unequal data length src={src} values={src.values} / written_data={values[len(values) - remain:]}')
+                    return req_list
 
-    def _WriteRequestList(self, fx, address, values, req_list=None):
-        if req_list is None: req_list = []
-        matched_src_list = self._MatchSourceList(fx, address)
-        if len(matched_src_list) == 1:
-            src = matched_src_list[0]
-            if len(values) == src.length:
                 req_list.append(src)
-                return req_list
-            elif len(values) < src.length:
-                self.logger.warning(f'Unequal data length src={src} values={src.values} / written_data={values}')
+                if remain == src.length:
+                    return req_list
+                address += src.length
+                remain -= src.length
+
+            elif len(matched_src_list) > 1:
+                self.logger.warning('\n'.join([f'Duplicated sources of unit={unit_id} fx={fx} address={address}', *(str(src) for src in matched_src_list)]))
                 return req_list
             else:
-                req_list.append(src)
-                address += src.length
-                values = values[src.length:]
-                return self._WriteRequestList(fx, address, values, req_list=req_list)
+                self.logger.warning(f'No matched source of unit={unit_id} fx={fx} address={address}')
+                return req_list
 
-        elif len(matched_src_list) > 1:
-            self.logger.warning('\n'.join([f'Duplicated sources of fx={fx} address={address}', *(str(src) for src in matched_src_list)]))
-            return req_list
-        else:
-            self.logger.warning(f'No matched source of fx={fx} address={address}')
-            return req_list
-
-    def Write(self, fx, address, values):
-        req_list = self._WriteRequestList(fx, address, values)
-        for src in req_list:
-            original_val = src.values
-            req,err = src.Write(values[:src.length])
-            if req:
-                try:
-                    decode_func = src.target.dataType.Decode
-                    original_val = decode_func(original_val)
-                    src_values = decode_func(src.values)
-                except:
-                    src_values = src.values
+    def _WritePlan(self, fx, address, values, unit_id=0x00):
+        """將匹配的 sources 依序切分寫入值，同一設備上位址連續者合併成 WriteBlock"""
+        blocks = []
+        offset = 0
+        for src in self._WriteRequestList(fx, address, values, unit_id):
+            src_values = values[offset:offset + src.length]
+            offset += src.length
+            if not (blocks and blocks[-1].TryMerge(src, src_values)):
+                blocks.append(WriteBlock(src, src_values))
+        return blocks
 
-                self.logger.info(f'Writeback success for {src} : {original_val} -> {src_values}')
+    def Write(self, fx, address, values, unit_id=0x00):
+        written = []
+        for block in self._WritePlan(fx, address, values, unit_id):
+            if not self._WriteBlock(block, written):
+                self._Rollback(written)
+                return 0
+        return 1
 
-                values = values[src.length:]
-                address += src.length
-            else:
-                self.logger.error(f'Writeback failed. {src} {err}')
+    def _WriteBlock(self, block, written):
+        """區塊寫入失敗時改為逐一寫入，以回報各 source 的結果；
+        成功寫入的 (src, original_val) 加入 written，供後續失敗時還原"""
+        original_vals = [src.values for src in block.sources]
+        if len(block) > 1:
+            try:
+                req,err = block.Write()
+            except Exception as e:
+                req,err = 0,e
+
+            if req:
+                for src, original_val in zip(block.sources, original_vals):
+                    self._SetWriteResult(src, original_val, req, err)
+                    written.append((src, original_val))
+                return req
+            self.logger.debug(f'Block write failed {block} {err}')
+
+        for (src, values), original_val in zip(block, original_vals):
+            try:
+                req,err = src.Write(values)
+            except Exception as e:
+                req,err = 0,e
+            if not self._SetWriteResult(src, original_val, req, err):
                 return 0
+            written.append((src, original_val))
+        return 1
+
+    def _Rollback(self, written):
+        """部分寫入失敗時，將同一次請求中已寫入的 sources 還原為寫入前的值"""
+        for src, original_val in reversed(written):
+            if original_val is None:
+                self.logger.warning(f'Rollback skipped (no original value) {src}')
+                continue
+            try:
+                req,err = src.Write(original_val)
+            except Exception as e:
+                req,err = 0,e
+            self._SetRollbackResult(src, original_val, req, err)
+
+    def _SetRollbackResult(self, src, original_val, req, err):
+        if req:
+            self.logger.info(f'Rollback {src} -> {original_val}')
+        else:
+            self.logger.error(f'Rollback failed {src} {err}')
+
+    def _SetWriteResult(self, src, original_val, req, err):
+        if req:
+            try:
+                decode_func = src.target.dataType.Decode
+                original_val = decode_func(original_val)
+                src_values = decode_func(src.values)
+            except:
+                src_values = src.values
+
+            self.logger.info(f'Writeback success for {src} : {original_val} -> {src_values}')
+        else:
+            self.logger.error(f'Writeback failed. {src} {err}')
+        return req
@@ -0,0 +1,70 @@
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait
+from time import perf_counter
+
+from cycle_stats import CycleStats
+from mirror_sync import SyncMirror
+
+
+class ThreadMirror(SyncMirror):
+    """每個 client 各自擁有一個 worker thread 平行讀取，
+    讀取週期由 sum(各設備延遲) 變為 max(各設備延遲)，單一設備逾時不再拖累其他設備
+    """
+    def __init__(self, src_list, logger, **kwargs) -> None:
+        super().__init__(src_list, logger, **kwargs)
+        self._workers = {}
+        self.client_stats = {}
+        self._client_names = {}
+        self.cycle_stats = CycleStats()
+
+    def log_status(self):
+        super().log_status()
+        self.logger.info(f'\tcycle {self.cycle_stats.dict}')
+        for client_key, stats in self.client_stats.items():
+            self.logger.debug(f'\t{self._client_names[client_key]} {stats.dict}')
+
+    def _ClientKey(self, src):
+        # 可流水線讀取的 sources 以設備為單位共用一個 worker (同一條連線)
+        return getattr(src, 'pipeline_key', None) or src.client_key
+
+    def _Worker(self, client_key, client):
+        if client_key not in self._workers:
+            self._workers[client_key] = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'Mirror-{client}')
+            self.client_stats[client_key] = CycleStats()
+            self._client_names[client_key] = str(client)
+        return self._workers[client_key]
+
+    def Read(self):
+        t0 = perf_counter()
+        client_blocks = defaultdict(list)
+        for block in self._DueBlocks():
+            client_blocks[self._ClientKey(block.sources[0])].append(block)
+
+        futures = []
+        for client_key, blocks in client_blocks.items():
+            worker = self._Worker(client_key, blocks[0].sources[0].client)
+            futures.append(worker.submit(self._ReadClient, client_key, blocks))
+
+        wait(futures)
+        self.cycle_stats.update(perf_counter() - t0)
+
+    @property
+    def stats(self):
+        """各 client 的讀取週期統計 {client: {count, last_sec, avg_sec, max_sec}}"""
+        return {self._client_names[k]: v.dict for k, v in self.client_stats.items()}
+
+    def _ReadClient(self, client_key, blocks):
+        t0 = perf_counter()
+        try:
+            for group in self._PipelineGroups(blocks):
+                self._ReadBlocks(group)
+        except Exception as e:
+            self.logger.error(f'Read failed {blocks[0].sources[0].client} \n{e}')
+        finally:
+            self.client_stats[client_key].update(perf_counter() - t0)
+
+    def Disconnect(self):
+        for worker in self._workers.values():
+            worker.shutdown(wait=False)
+        self._workers.clear()
+        super().Disconnect()
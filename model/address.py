@@ -10,6 +10,7 @@ class TargetAddress(BaseModel):
     data_type: str = Field(alias='DataType', default=None)
     abcd: str = Field(alias='ABCD', default=None)
     addr_start_from: str = Field(alias='addr_start_from', default=None)
+    target_unit_id: str = Field(alias='TargetUnitID', default=None)
     target_desc: str = Field(alias='TargetDesc', default=None)
 
 
@@ -23,6 +24,10 @@ class SourceAddress(BaseModel):
     source_dataype: str = Field(alias='SourceDataype', default=None)
     addr_start_from: str = Field(alias='addr_start_from', default=None)
     formulaX: str = Field(alias='FormulaX', default=None)
+    source_poll_sec: str = Field(alias='SourcePollSec', default=None)
+    source_poll_priority: str = Field(alias='SourcePollPriority', default=None)
+    source_deadband: str = Field(alias='SourceDeadband', default=None)
+    source_deadband_pct: str = Field(alias='SourceDeadbandPct', default=None)
     source_desc: str = Field(alias='SourceDesc', default=None)
 
 
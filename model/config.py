@@ -24,8 +24,18 @@ class SourceConfig(BaseModel):
     server_port: int = Field(alias='server_port', default=5020)
     server_sid: int = Field(alias='server_sid', default=0x00)
     server_null_value: int = Field(alias='server_null_value', default=-99)
+    server_sparse: bool = Field(alias='server_sparse', default=False)
+    server_sparse_gap: int = Field(alias='server_sparse_gap', default=0)
+    server_unmapped_error: str = Field(alias='server_unmapped_error', default='IllegalAddress')
+    server_changed_only: bool = Field(alias='server_changed_only', default=True)
     mirror_refresh_sec: float = Field(alias='mirror_refresh_sec', default=0.5)
     mirror_retry_sec: int = Field(alias='mirror_retry_sec', default=10 * 60)
+    mirror_block_read: bool = Field(alias='mirror_block_read', default=True)
+    mirror_block_gap: int = Field(alias='mirror_block_gap', default=0)
+    mirror_timeout_sec: float = Field(alias='mirror_timeout_sec', default=3.)
+    hsl_pipeline_depth: int = Field(alias='hsl_pipeline_depth', default=1)
+    writeback_queue: bool = Field(alias='writeback_queue', default=False)
+    formula_vectorize: bool = Field(alias='formula_vectorize', default=True)
     readwrite_retry_sec: int = Field(alias='readwrite_retry_sec', default=10 * 60)
     shutdown_delay_sec: int = Field(alias='shutdown_delay_sec', default=0)
     opcua: OpcuaConfig = Field(alias='opcua', default=None)
@@ -1,18 +1,278 @@
+from array import array
+from bisect import bisect_right
+from threading import Lock
+
 import pymodbus.datastore as ds
+from pymodbus.datastore.store import BaseModbusDataBlock
+from pymodbus.exceptions import NoSuchSlaveException
 from source import PointType
 
+
+class RegisterArrayBlock(BaseModbusDataBlock):
+    """以 array('H') 儲存的 register datablock (每點 2 bytes，list of int 每點約 36 bytes)：
+        - getValues() 返回 memoryview 切片，讀取不複製資料
+        - 雙緩衝快照：server 的讀寫作用在 values (front)；mirror 於 BeginSnapshot() 複製出 back，
+          以 Stage() 寫入整個週期的數值，PublishSnapshot() 時一次替換 values，client 不會讀到更新到一半的掃描結果
+        - 快照期間 server 的寫入同時寫進 back，發佈時不會被舊的複本覆蓋 (以 _lock 與複製/替換互斥)
+        - 發佈時替換整個 array，先前返回的 memoryview 仍指向舊的 (不再變動的) array
+    """
+    def __init__(self, address, count, default_value=0):
+        self.address = address
+        self.default_value = default_value
+        self.values = array('H', [default_value]) * count
+        self._back = None
+        self._lock = Lock()
+
+    def __str__(self): return f'{__class__.__name__}({len(self.values)}, {self.default_value})'
+    def __len__(self): return len(self.values)
+
+    @classmethod
+    def create(cls):
+        return cls(0x00, 65536)
+
+    def reset(self):
+        self.values = array('H', [self.default_value]) * len(self.values)
+
+    def validate(self, address, count=1):
+        start = address - self.address
+        return 0 <= start and start + count <= len(self.values)
+
+    def getValues(self, address, count=1):
+        start = address - self.address
+        return memoryview(self.values)[start:start + count]
+
+    def setValues(self, address, values):
+        if not isinstance(values, list):
+            values = [values]
+        start = address - self.address
+        values = array('H', values)
+        with self._lock:
+            self.values[start:start + len(values)] = values
+            if self._back is not None:
+                self._back[start:start + len(values)] = values
+
+    def BeginSnapshot(self):
+        with self._lock:
+            self._back = self.values[:]
+
+    def Stage(self, address, values):
+        start = address - self.address
+        self._back[start:start + len(values)] = array('H', values)
+
+    def PublishSnapshot(self):
+        with self._lock:
+            self.values, self._back = self._back, None
+
+
+class BitArrayBlock(BaseModbusDataBlock):
+    """以 bytearray 按位元打包儲存的 coil/discrete input datablock (每 8 點 1 byte)，
+    getValues() 返回 list of bool (pymodbus 的 pack_bitstring 需要)；
+    BeginSnapshot/Stage/PublishSnapshot 的快照行為同 RegisterArrayBlock
+    """
+    def __init__(self, address, count, default_value=False):
+        self.address = address
+        self.default_value = default_value
+        self.count = count
+        self.values = self._Fill(count, default_value)
+        self._back = None
+        self._lock = Lock()
+
+    def __str__(self): return f'{__class__.__name__}({self.count}, {self.default_value})'
+    def __len__(self): return self.count
+
+    def __iter__(self):
+        return enumerate(self.getValues(self.address, self.count), self.address)
+
+    @staticmethod
+    def _Fill(count, value):
+        return bytearray([0xFF if value else 0x00]) * ((count + 7) >> 3)
+
+    @classmethod
+    def create(cls):
+        return cls(0x00, 65536)
+
+    def reset(self):
+        self.values = self._Fill(self.count, self.default_value)
+
+    def validate(self, address, count=1):
+        start = address - self.address
+        return 0 <= start and start + count <= self.count
+
+    def getValues(self, address, count=1):
+        start = address - self.address
+        first, last = start >> 3, (start + count + 7) >> 3
+        bits = int.from_bytes(self.values[first:last], 'little') >> (start & 7)
+        return [bool(bits >> i & 1) for i in range(count)]
+
+    @staticmethod
+    def _SetBits(buffer, start, values):
+        for i, val in enumerate(values, start):
+            if val:
+                buffer[i >> 3] |= 1 << (i & 7)
+            else:
+                buffer[i >> 3] &= ~(1 << (i & 7)) & 0xFF
+
+    def setValues(self, address, values):
+        if not isinstance(values, list):
+            values = [values]
+        with self._lock:
+            self._SetBits(self.values, address - self.address, values)
+            if self._back is not None:
+                self._SetBits(self._back, address - self.address, values)
+
+    def BeginSnapshot(self):
+        with self._lock:
+            self._back = self.values[:]
+
+    def Stage(self, address, values):
+        self._SetBits(self._back, address - self.address, values)
+
+    def PublishSnapshot(self):
+        with self._lock:
+            self.values, self._back = self._back, None
+
+
+class SegmentedDataBlock(BaseModbusDataBlock):
+    """只配置 address map 實際使用的位址區段 (segments)，每段各為一個 array/bitset datablock；
+    單次請求必須完整落在同一區段內，否則 validate() 為 False
+    """
+    def __init__(self, segments, block_cls):
+        self.blocks = [block_cls(start, end - start) for start, end in segments]
+        self._starts = [block.address for block in self.blocks]
+        self.address = self._starts[0] if self._starts else 0
+        self.default_value = block_cls(0, 0).default_value
+
+    def __str__(self): return f'{__class__.__name__}({len(self.blocks)} segments, {self.size})'
+
+    def __iter__(self):
+        for block in self.blocks:
+            yield from block
+
+    @property
+    def size(self): return sum(len(block) for block in self.blocks)
+
+    def _Find(self, address, count=1):
+        i = bisect_right(self._starts, address) - 1
+        if i >= 0 and self.blocks[i].validate(address, count):
+            return self.blocks[i]
+        return None
+
+    def reset(self):
+        for block in self.blocks:
+            block.reset()
+
+    def validate(self, address, count=1):
+        return self._Find(address, count) is not None
+
+    def getValues(self, address, count=1):
+        return self._Find(address, count).getValues(address, count)
+
+    def setValues(self, address, values):
+        if not isinstance(values, list):
+            values = [values]
+        self._Find(address, len(values)).setValues(address, values)
+
+    def BeginSnapshot(self):
+        for block in self.blocks:
+            block.BeginSnapshot()
+
+    def Stage(self, address, values):
+        self._Find(address, len(values)).Stage(address, values)
+
+    def PublishSnapshot(self):
+        for block in self.blocks:
+            block.PublishSnapshot()
+
+
+class UnmappedAddressError(Exception):
+    """請求的位址不在 address map 中 (pymodbus server 將其回應為 SlaveFailure)"""
+
+
 class LinkedSlaveContext(ds.ModbusSlaveContext):
-    def __init__(self, ctrl, *args, **kwargs):
+    # 讀寫未配置位址時回應的 Modbus exception
+    UNMAPPED_ERRORS = ['IllegalAddress', 'SlaveFailure', 'GatewayNoResponse']
+
+    def __init__(self, ctrl, *args, unit_id:int=0x00, unmapped_error:str='IllegalAddress', **kwargs):
         super().__init__(*args, **kwargs)
+        assert unmapped_error in __class__.UNMAPPED_ERRORS, f'Invalid unmapped_error: {unmapped_error}'
         self.ctrl = ctrl
+        self.unit_id = unit_id
+        self.unmapped_error = unmapped_error
+
+    def validate(self, fx, address, count=1):
+        """pymodbus 於 validate 為 False 時回應 IllegalAddress；
+        其他 exception 以拋出例外的方式交由 server 轉換 (SlaveFailure / GatewayNoResponse)
+        """
+        if super().validate(fx, address, count):
+            return True
+        if self.unmapped_error == 'SlaveFailure':
+            raise UnmappedAddressError(f'fx={fx} address={address} count={count}')
+        if self.unmapped_error == 'GatewayNoResponse':
+            raise NoSuchSlaveException(f'Unmapped address fx={fx} address={address} count={count}')
+        return False
 
     def setValues(self, fx, address, values, writeback=True):
         super().setValues(fx, address, values)
         if writeback:
-            self.ctrl.WriteMirror(fx, address, values)
+            self.ctrl.WriteMirror(fx, address, values, self.unit_id)
+
+    def BeginSnapshot(self):
+        """開始一個週期的快照，之後以 Stage() 寫入、PublishSnapshot() 發佈"""
+        for block in self.store.values():
+            block.BeginSnapshot()
+
+    def Stage(self, fx, address, values):
+        """寫入快照 (不經過 pymodbus 的 validate/log，也不觸發 writeback)"""
+        if not self.zero_mode:
+            address = address + 1
+        self.store[self.decode(fx)].Stage(address, values)
+
+    def PublishSnapshot(self):
+        for block in self.store.values():
+            block.PublishSnapshot()
+
+    @staticmethod
+    def DataBlock(point_type, segments=None):
+        """coil/discrete input 以位元打包，register 以 array('H') 儲存；
+        給定 segments [(start, end), ...] 時只配置這些區段 (SegmentedDataBlock)
+        """
+        block_cls = RegisterArrayBlock if PointType(point_type).IsRegister else BitArrayBlock
+        if segments is None:
+            return block_cls.create()
+        return SegmentedDataBlock(segments, block_cls)
+
+    @classmethod
+    def SlaveContext(cls, ctrl, unit_id:int=0x00, zero_mode:bool=False, segments:dict=None,
+                     unmapped_error:str='IllegalAddress'):
+        """segments: {type_str: [(start, end), ...]} (address_from0)，None 時配置完整的 65536 個位址"""
+        if segments is None:
+            kw = {pt: cls.DataBlock(pt) for pt in PointType.OPTIONS}
+        else:
+            offset = 0 if zero_mode else 1
+            kw = {
+                pt: cls.DataBlock(pt, [(start + offset, end + offset) for start, end in segments.get(pt, [])])
+                for pt in PointType.OPTIONS
+            }
+        return cls(ctrl, **kw, unit_id=unit_id, zero_mode=zero_mode, unmapped_error=unmapped_error)
 
     @classmethod
-    def ServerContext(cls, ctrl, zero_mode:bool=False, single_slave_mode:bool=True):
-        kw = {pt: ds.ModbusSequentialDataBlock.create() for pt in PointType.OPTIONS}
-        store = cls(ctrl, **kw, zero_mode=zero_mode)
-        return ds.ModbusServerContext(slaves=store, single=single_slave_mode)
+    def ServerContext(cls, ctrl, zero_mode:bool=False, single_slave_mode:bool=True,
+                      unit_ids=(0x00,), segments:dict=None, unmapped_error:str='IllegalAddress'):
+        """每個 unit id 各自一個 slave context (virtual slave)
+            - single_slave_mode: 只有一個 unit，且任何 unit id 的請求皆由它回應
+            - segments: {unit_id: {type_str: [(start, end), ...]}}，None 時各 unit 皆配置完整位址
+        """
+        assert not (single_slave_mode and len(unit_ids) > 1), 'single_slave_mode only supports one unit id'
+        slaves = {
+            unit_id: cls.SlaveContext(
+                ctrl,
+                unit_id=unit_id,
+                zero_mode=zero_mode,
+                segments=None if segments is None else segments.get(unit_id, {}),
+                unmapped_error=unmapped_error,
+            )
+            for unit_id in unit_ids
+        }
+        if single_slave_mode:
+            return ds.ModbusServerContext(slaves=slaves[unit_ids[0]], single=True)
+        return ds.ModbusServerContext(slaves=slaves, single=False)
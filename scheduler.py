@@ -0,0 +1,36 @@
+from time import monotonic
+
+
+class FixedRateScheduler:
+    """以絕對時間為基準的固定週期排程：
+    下一次截止時間 = 上一次截止時間 + period_sec，讀寫耗時不會累積成週期漂移；
+    若已超過截止時間 (overrun)，立即執行下一輪並重新對齊，不補跑錯過的週期
+    """
+    def __init__(self, period_sec: float):
+        self.period_sec = float(period_sec)
+        self.is_overrun = False
+        self.overrun_count = 0
+        self.last_overrun_sec = 0.
+        self._deadline = None
+
+    def __repr__(self):
+        return f'<{__class__.__name__} period={self.period_sec} overrun={self.overrun_count}>'
+
+    def Reset(self):
+        self._deadline = None
+
+    def Next(self):
+        """回傳距離下一個截止時間的秒數 (>= 0)，並同時推進截止時間"""
+        now = monotonic()
+        if self._deadline is None:
+            self._deadline = now
+
+        self._deadline += self.period_sec
+        delay = self._deadline - now
+        self.is_overrun = delay < 0
+        if self.is_overrun:
+            self.overrun_count += 1
+            self.last_overrun_sec = -delay
+            self._deadline = now
+            return 0.
+        return delay
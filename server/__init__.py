@@ -1 +1,2 @@
-from .pymodbus_sync import SyncTcpServer
\ No newline at end of file
+from .pymodbus_sync import SyncTcpServer
+from .pymodbus_async import AsyncTcpServer
@@ -0,0 +1,61 @@
+import asyncio
+from pymodbus.server.async_io import ModbusTcpServer
+from ._base import ServerBase
+
+__version__ = (0, 0, 1)
+
+
+class AsyncTcpServer(ServerBase):
+    """使用 pymodbus 的 asyncio ModbusTcpServer
+    Setup() 時傳入 loop 可與 AsyncMirror 共用同一個 event loop；未傳入時自行建立
+    """
+    def __init__(self, host: str, port: int, logger) -> None:
+        super().__init__(host, port, logger)
+        self.loop = None
+        self._server = None
+
+    def _SetIdentity(self):
+        super()._SetIdentity()
+        self.identity.MajorMinorRevision = __version__
+
+    def Setup(self, context, allow_reuse_address=False, loop=None, **kwargs):
+        """asyncio ModbusTcpServer 的初始化
+        """
+        super().Setup(context)
+        self.loop = loop or asyncio.new_event_loop()
+        self._server = ModbusTcpServer(
+            context=self.context,
+            identity=self.identity,
+            address=self.address_tuple,
+            allow_reuse_address=allow_reuse_address,
+            loop=self.loop,
+            **kwargs,
+        )
+
+    async def _Serve(self):
+        try:
+            await self._server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+
+    def Run(self):
+        self.logger.info(f'===== Starting {__class__.__name__} at {self.host}:{self.port} =====')
+        if self.loop.is_running():
+            asyncio.run_coroutine_threadsafe(self._Serve(), self.loop)
+        else:
+            self.loop.run_until_complete(self._Serve())
+
+    def Start(self, name=None):
+        """loop 已在其他 thread 執行 (共用 AsyncMirror 的 loop) 時，直接排程於該 loop"""
+        if self.loop.is_running():
+            self.Run()
+        else:
+            super().Start(name=name)
+
+    def Stop(self):
+        self.logger.info('Stopping...')
+        if self._server.server is not None:
+            self.loop.call_soon_threadsafe(self._server.server_close)
+        if self._thread is not None:
+            self._thread.join()
+        self.logger.info('Shutdown complete!')
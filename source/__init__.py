@@ -1,10 +1,14 @@
 from .point_type import PointType
 from .data_type import DataType, EDataOrder
+from .poll import PollGroup
+from .address_index import AddressIndex
 from .list import MirrorSourceList, AddressList
+from .block import ReadBlock, WriteBlock, ReadPlanner
 
 from .status import SourceStatus
 
 from .pymodbus import PyModbusTcpSource, PyModbusTcpClient
+from .aio import AioModbusTcpClient
 from .json import JsonSource
 from .hsl import HslModbusTcpSource
 
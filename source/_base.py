@@ -19,6 +19,11 @@ class SourcePairBase(metaclass=abc.ABCMeta):
     def length(self): return self.target.length
     def __len__(self): return self.length
 
+    @property
+    def client_key(self):
+        """共用同一個連線的 sources 具有相同的 client_key (可 hash)"""
+        return self.client.key
+
     def Connect(self): return self.client.Connect()
     def Disconnect(self): return self.client.Disconnect()
 
@@ -49,6 +54,9 @@ class ClientBase(metaclass=abc.ABCMeta):
             isinstance(self.port, int),
         ])
 
+    @property
+    def key(self): return (self.__class__.__name__, self.ip, self.port)
+
     @abc.abstractmethod
     def __eq__(self, o) -> bool: raise NotImplementedError
 
@@ -103,6 +111,7 @@ class SourceBase(metaclass=abc.ABCMeta):
 
         self.values = None
         self.client = None
+        self.status = SourceStatus.NOT_STARTED
 
     @property
     def length(self): return self.target.length
@@ -0,0 +1,69 @@
+from bisect import bisect_right
+from collections import defaultdict
+
+
+class AddressIndex:
+    """依 target (unit_id, pointType) 分別維護已佔用的位址區間 [start, end)，
+    區間依 start 排序且互不重疊，衝突檢查只需比對前後相鄰的區間 (bisect, O(log n))
+    """
+    def __init__(self):
+        self._starts = defaultdict(list)
+        self._items = defaultdict(list)
+
+    def __len__(self): return sum(len(items) for items in self._items.values())
+
+    @staticmethod
+    def _Interval(target):
+        table = (target.unit_id, target.pointType.type_str)
+        return table, target.address_from0, target.address_from0 + target.length
+
+    def Conflict(self, target):
+        """返回與 target 位址重疊的既有 source，無衝突時返回 None"""
+        table, start, end = self._Interval(target)
+        starts, items = self._starts[table], self._items[table]
+        i = bisect_right(starts, start)
+        if i > 0 and items[i - 1][1] > start:
+            return items[i - 1][2]
+        if i < len(items) and items[i][0] < end:
+            return items[i][2]
+        return None
+
+    def Add(self, src):
+        table, start, end = self._Interval(src.target)
+        i = bisect_right(self._starts[table], start)
+        self._starts[table].insert(i, start)
+        self._items[table].insert(i, (start, end, src))
+
+    @property
+    def unit_ids(self):
+        return sorted({unit_id for (unit_id, _), items in self._items.items() if items})
+
+    def Segments(self, gap=0) -> dict:
+        """合併相鄰 (間隔不超過 gap) 的已佔用區間
+        Return: {unit_id: {type_str: [(start, end), ...]}}
+        """
+        segments = {}
+        for (unit_id, type_str), items in self._items.items():
+            merged = []
+            for start, end, _ in items:
+                if merged and start - merged[-1][1] <= gap:
+                    merged[-1][1] = max(merged[-1][1], end)
+                else:
+                    merged.append([start, end])
+            segments.setdefault(unit_id, {})[type_str] = [tuple(seg) for seg in merged]
+        return segments
+
+    @classmethod
+    def FindConflicts(cls, src_list) -> list:
+        """依 src_list 的順序一次找出所有位址衝突 (結果同逐一 append 時的 _Validate)
+        Return: [(src, conflicted_src), ...]，src 為會被拒絕的 source，conflicted_src 為先佔用該位址的 source
+        """
+        index = cls()
+        conflicts = []
+        for src in src_list:
+            conflicted_src = index.Conflict(src.target)
+            if conflicted_src is None:
+                index.Add(src)
+            else:
+                conflicts.append((src, conflicted_src))
+        return conflicts
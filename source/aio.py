@@ -0,0 +1,133 @@
+import asyncio
+import struct
+
+from . import PointType
+
+
+class AioModbusTcpClient:
+    """以 asyncio streams 實作的 Modbus-TCP client (non-blocking transport)，
+    每個 request 皆有逾時限制；同一連線上的 request 依序送出
+    """
+    _default_timeout_sec = 3.
+
+    def __init__(self, ip, port, timeout_sec: float = None):
+        self.ip = ip
+        self.port = int(port)
+        self.timeout_sec = float(timeout_sec or __class__._default_timeout_sec)
+        self._reader = None
+        self._writer = None
+        self._lock = None
+        self._transaction_id = 0
+
+    def __repr__(self) -> str:
+        return f'<{__class__.__name__}@{self.ip}:{self.port}'
+
+    @property
+    def is_connected(self):
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def Connect(self):
+        """
+        Return:
+            1,None: connect 成功
+            0,err: connect 失敗、附帶錯誤
+        """
+        if self.is_connected:
+            return 1, None
+        try:
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self.ip, self.port),
+                self.timeout_sec,
+            )
+            return 1, None
+        except Exception as e:
+            self._Close()
+            return 0, e
+
+    async def Disconnect(self):
+        if self.is_connected:
+            self._Close()
+            return 1
+        else:
+            return 0
+
+    def _Close(self):
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = None
+        self._writer = None
+
+    async def _Request(self, unit: int, pdu: bytes):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            if not self.is_connected:
+                res, err = await self.Connect()
+                if not res:
+                    raise ConnectionError(f'{self} {err}')
+
+            self._transaction_id = (self._transaction_id + 1) & 0xFFFF
+            frame = struct.pack('>HHHB', self._transaction_id, 0, len(pdu) + 1, unit) + pdu
+            try:
+                self._writer.write(frame)
+                return await asyncio.wait_for(self._Receive(self._transaction_id), self.timeout_sec)
+            except BaseException:
+                # 逾時/中斷後連線上可能殘留舊的回應，直接斷線重連
+                self._Close()
+                raise
+
+    async def _Receive(self, transaction_id):
+        await self._writer.drain()
+        head = await self._reader.readexactly(7)
+        tid, _, length, _ = struct.unpack('>HHHB', head)
+        body = await self._reader.readexactly(length - 1)
+        if tid != transaction_id:
+            raise ConnectionError(f'Transaction id mismatch {tid} != {transaction_id}')
+        return body
+
+    async def Read(self, point_type: PointType, address_from0: int, count: int, unit: int):
+        """
+        Return:
+            1,values: registers(list of int) 或 bits(list of bool)
+            0,err: 讀取失敗、附帶錯誤
+        """
+        try:
+            body = await self._Request(unit, struct.pack('>BHH', point_type.fx, address_from0, count))
+        except Exception as e:
+            return 0, e
+
+        if body[0] & 0x80:
+            return 0, Exception(f'ModbusException fx={point_type.fx} code={body[1]}')
+
+        data = body[2:2 + body[1]]
+        if point_type.IsRegister:
+            return 1, list(struct.unpack(f'>{count}H', data))
+        else:
+            return 1, [bool(data[i // 8] >> (i % 8) & 0x01) for i in range(count)]
+
+    async def Write(self, values, point_type: PointType, address_from0: int, unit: int):
+        """
+        Return:
+            1,values: 寫入成功
+            0,err: 寫入失敗、附帶錯誤
+        """
+        if point_type.type_str == 'hr':
+            pdu = struct.pack(f'>BHHB{len(values)}H', 16, address_from0, len(values), len(values) * 2, *values)
+        elif point_type.type_str == 'co':
+            packed = bytearray((len(values) + 7) // 8)
+            for i, bit in enumerate(values):
+                if bit:
+                    packed[i // 8] |= 1 << (i % 8)
+            pdu = struct.pack('>BHHB', 15, address_from0, len(values), len(packed)) + bytes(packed)
+        else:
+            return 0, Exception('PointtypeNotWritable')
+
+        try:
+            body = await self._Request(unit, pdu)
+        except Exception as e:
+            return 0, e
+
+        if body[0] & 0x80:
+            return 0, Exception(f'ModbusException fx={body[0] & 0x7F} code={body[1]}')
+        return 1, values
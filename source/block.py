@@ -0,0 +1,161 @@
+from collections import defaultdict
+
+
+class ReadBlock:
+    """同一個 client/slave_id/pointType 下、位址相鄰的 sources，合併成一次 range request"""
+    def __init__(self, src):
+        self.sources = [src]
+        # 無位址的 source (例如 JsonSource) 只會單獨成為一個區塊
+        self.start = getattr(src, 'address_from0', 0)
+        self.end = self.start + len(src)
+
+    def __repr__(self):
+        return f'<{__class__.__name__}@{self.sources[0]} [{self.start}:{self.end}] *{len(self.sources)}>'
+
+    def __iter__(self): return iter(self.sources)
+    def __len__(self): return len(self.sources)
+
+    @property
+    def count(self): return self.end - self.start
+
+    def TryMerge(self, src, max_gap, max_count):
+        """src 與目前區塊的間隔不超過 max_gap、且合併後長度不超過 max_count 時併入"""
+        src_start = src.address_from0
+        src_end = src_start + len(src)
+        if src_start - self.end > max_gap:
+            return False
+        if max(self.end, src_end) - self.start > max_count:
+            return False
+
+        self.sources.append(src)
+        self.end = max(self.end, src_end)
+        return True
+
+    def Read(self):
+        """
+        Return:
+            1,val: 整個區塊讀取成功，已將結果切片寫回各 src.values
+            0,info: 讀取失敗、附帶錯誤訊息
+        """
+        if len(self.sources) == 1:
+            return self.sources[0].Read()
+
+        req, val = self.sources[0].BlockRead(self.start, self.count)
+        if req:
+            for src in self.sources:
+                src.SetBlockValues(val, src.address_from0 - self.start)
+        return req, val
+
+    @staticmethod
+    def ReadPipelined(blocks):
+        """同一設備 (pipeline_key 相同) 的多個區塊，由第一個區塊的 source 於同一條連線流水線讀取
+        Return: [(1,val) | (0,info), ...]，順序同 blocks；成功的區塊已寫回各 src.values
+        """
+        reader = blocks[0].sources[0]
+        results = reader.PipelineRead([(block.sources[0], block.start, block.count) for block in blocks])
+        for block, (req, val) in zip(blocks, results):
+            if req:
+                for src in block:
+                    src.SetBlockValues(val, src.address_from0 - block.start)
+        return results
+
+
+class WriteBlock:
+    """同一個 client/slave_id/pointType 下、位址連續的寫入，合併成一次 block write"""
+    def __init__(self, src, values):
+        self.sources = [src]
+        self.values_list = [values]
+        self.start = getattr(src, 'address_from0', 0)
+        self.end = self.start + len(src)
+
+    def __repr__(self):
+        return f'<{__class__.__name__}@{self.sources[0]} [{self.start}:{self.end}] *{len(self.sources)}>'
+
+    def __iter__(self): return iter(zip(self.sources, self.values_list))
+    def __len__(self): return len(self.sources)
+
+    @property
+    def count(self): return self.end - self.start
+
+    @property
+    def values(self):
+        """各 src 的寫入值截至設備端長度 len(src) (同 PyModbusTcpSource.Write) 後串接"""
+        return [val for src, values in self for val in values[:len(src)]]
+
+    @staticmethod
+    def _Mergeable(src):
+        """設備端長度 len(src) 與 target 長度不同時 (SourceDataype 與 target 型別不同)，
+        server 寫入的值無法直接對應設備位址，只能逐一寫入"""
+        return src.is_writable and getattr(src, 'BlockWrite', None) is not None \
+            and getattr(src, 'block_key', None) is not None and len(src) == src.length
+
+    def TryMerge(self, src, values):
+        """src 緊接在區塊之後、block_key 相同且合併後不超過單次寫入上限時併入"""
+        head = self.sources[0]
+        if not (self._Mergeable(head) and self._Mergeable(src)):
+            return False
+        if src.block_key != head.block_key or src.address_from0 != self.end:
+            return False
+        if self.count + len(src) > src.pointType.MaxWriteCount:
+            return False
+
+        self.sources.append(src)
+        self.values_list.append(values)
+        self.end += len(src)
+        return True
+
+    def Write(self):
+        """
+        Return:
+            1,values: 整個區塊寫入成功，已更新各 src.values
+            0,info: 寫入失敗、附帶錯誤訊息
+        """
+        if len(self.sources) == 1:
+            return self.sources[0].Write(self.values_list[0])
+
+        req, info = self.sources[0].BlockWrite(self.start, self.values)
+        if req:
+            for src, values in self:
+                src.values = values[:len(src)]
+        return req, info
+
+
+class ReadPlanner:
+    """將 sources 依 block_key 分組，並合併成最少數量的 ReadBlock"""
+    max_cached = 32
+
+    def __init__(self, max_gap=0, enabled=True):
+        self.max_gap = int(max_gap)
+        self.enabled = enabled
+        self._plans = {}
+
+    def Plan(self, src_list):
+        """相同組成的 src_list 沿用已規劃的結果 (各輪詢週期的組合分別快取)"""
+        plan_key = tuple(id(src) for src in src_list)
+        plan = self._plans.get(plan_key)
+        if plan is None:
+            if len(self._plans) >= self.max_cached:
+                self._plans.clear()
+            plan = self._plans[plan_key] = self._Build(src_list)
+        return plan
+
+    def _Build(self, src_list):
+        groups = defaultdict(list)
+        blocks = []
+        for src in src_list:
+            key = getattr(src, 'block_key', None) if self.enabled else None
+            if key is None:
+                blocks.append(ReadBlock(src))
+            else:
+                groups[key].append(src)
+
+        for sources in groups.values():
+            max_count = sources[0].pointType.MaxReadCount
+            sources.sort(key=lambda src: src.address_from0)
+            block = None
+            for src in sources:
+                if block is None or not block.TryMerge(src, self.max_gap, max_count):
+                    block = ReadBlock(src)
+                    blocks.append(block)
+
+        return blocks
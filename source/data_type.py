@@ -1,5 +1,6 @@
 from enum import Enum
-from sys import byteorder
+from itertools import chain
+from struct import Struct
 
 from pymodbus.payload import BinaryPayloadBuilder, BinaryPayloadDecoder
 from . import PointType
@@ -7,6 +8,13 @@ from . import PointType
 _DEFAULT_BYTE_ORDER = '>'
 _DEFAULT_WORD_ORDER = '>'
 
+_STRUCT_CHR = {
+    '8bit_uint': 'B', '8bit_int': 'b',
+    '16bit_uint': 'H', '16bit_int': 'h', '16bit_float': 'e',
+    '32bit_uint': 'I', '32bit_int': 'i', '32bit_float': 'f',
+    '64bit_uint': 'Q', '64bit_int': 'q', '64bit_float': 'd',
+}
+
 
 class EDataOrder(Enum):
     ABCD = ">>"
@@ -32,10 +40,17 @@ class DataType:
         self._order = dict(byteorder=byteorder, wordorder=wordorder)
         
         self._GetFuncName()
+        self._Compile()
         self._GetLength()
 
     def __repr__(self): return f'<{__class__.__name__}: {self.type_str}>'
     def __str__(self): return self.type_str
+
+    @property
+    def codec_key(self):
+        """codec_key 相同的 DataType 編解碼結果相同，可共用 DecodeMany/EncodeMany"""
+        return (self.type_str, self._pType.type_str, self._order['byteorder'], self._order['wordorder'])
+
     @property
     def repr_short(self):
         if self._func_postfix == 'bits':
@@ -93,43 +108,131 @@ class DataType:
     @property
     def _DecodeFuncName(self): return 'decode_' + self._func_postfix
 
+    def _Compile(self):
+        """預先建立 struct.Struct，byteorder/wordorder 直接反映在格式的 endian 上：
+            - value: 依 wordorder 解讀整個數值的 bytes
+            - registers: byteorder 與 wordorder 不同時 (CDAB/BADC)，以 little endian 排列 words
+            - 8bit 與 pymodbus 相同，數值置於 register 的高位元組
+        bits/string 不使用 struct (_value_struct 為 None)
+        """
+        self._value_struct = None
+        self._reg_struct = None
+        self._many_structs = {}
+        self._use_struct = False
+        chr_ = _STRUCT_CHR.get(self._func_postfix)
+        if chr_ is None:
+            return
+
+        byteorder, wordorder = self._order['byteorder'], self._order['wordorder']
+        if chr_ in 'Bb':
+            self._value_struct = Struct(f'>{chr_}x')
+            reg_endian = '>'
+        else:
+            self._value_struct = Struct(wordorder + chr_)
+            reg_endian = '>' if byteorder == wordorder else '<'
+        self._reg_endian = reg_endian
+        self._reg_struct = Struct(f'{reg_endian}{self._value_struct.size // 2}H')
+        self._use_struct = self._pType.IsRegister
+
     def _GetLength(self):
-        dump_val = 0x0
-        self.Encode(dump_val)
+        if self._add_by_bits:
+            self._length = 1
+        elif self._reg_struct is not None:
+            self._length = self._reg_struct.size // 2
+        else:
+            dump_val = 0x0
+            self._BuilderEncode(dump_val)
 
-        payload = self.builder.build()
-        self._length = len(payload)
-        self.builder.reset()
+            payload = self.builder.build()
+            self._length = len(payload)
+            self.builder.reset()
 
     @property
     def length(self): return self._length
 
     def Encode(self, val):
-        self.builder = BinaryPayloadBuilder(**self._order)
-        add_func = getattr(self.builder, self._AddFuncName)
-        
         if self._add_by_bits:
-            add_func([val])
+            if self._pType.IsRegister:
+                return [0x0100 if val else 0x0000]
+            else:
+                return [bool(val)]
+
+        elif self._use_struct:
+            return list(self._reg_struct.unpack(self._value_struct.pack(val)))
+
         else:
-            add_func(val)
-            
+            return self._BuilderEncode(val)
+
+    def Decode(self, binary):
+        if self._add_by_bits:
+            if self._pType.IsRegister:
+                return binary[0] & 0x0100 == 0x0100
+            else:
+                return bool(binary[0])
+
+        elif self._use_struct:
+            return self._value_struct.unpack(self._reg_struct.pack(*binary[:self._length]))[0]
+
+        else:
+            return self._DecoderDecode(binary)
+
+    def _ManyStruct(self, kind, count):
+        """DecodeMany/EncodeMany 使用的 Struct，依數量快取"""
+        key = (kind, count)
+        if key not in self._many_structs:
+            if len(self._many_structs) >= 32:
+                self._many_structs.clear()
+            if kind == 'reg':
+                self._many_structs[key] = Struct(f'{self._reg_endian}{count}H')
+            else:
+                fmt = self._value_struct.format
+                self._many_structs[key] = Struct(fmt[0] + fmt[1:] * count)
+        return self._many_structs[key]
+
+    def DecodeMany(self, registers, offsets=None):
+        """一次解碼多個相同型別的數值
+            - registers: 平坦的 register list (例如區塊讀取的結果)
+            - offsets: 各數值起始的 register 位置；None 表示自 0 起連續排列
+        Return: list of values
+        """
+        length = self._length
+        if not self._use_struct:
+            if offsets is None:
+                offsets = range(0, len(registers) - length + 1, length)
+            return [self.Decode(registers[offset:offset + length]) for offset in offsets]
+
+        buf = self._ManyStruct('reg', len(registers)).pack(*registers)
+        if offsets is None:
+            usable = len(buf) - len(buf) % self._value_struct.size
+            return [val for val, in self._value_struct.iter_unpack(buf[:usable])]
+
+        unpack_from = self._value_struct.unpack_from
+        return [unpack_from(buf, offset * 2)[0] for offset in offsets]
+
+    def EncodeMany(self, values):
+        """一次編碼多個相同型別的數值，返回連續排列的平坦 register (或 coil) list"""
+        if not self._use_struct:
+            return list(chain.from_iterable(self.Encode(val) for val in values))
+
+        buf = self._ManyStruct('value', len(values)).pack(*values)
+        return list(self._ManyStruct('reg', len(values) * self._length).unpack(buf))
+
+    def _BuilderEncode(self, val):
+        """string 與 coil 上的數值型別仍以 pymodbus BinaryPayloadBuilder 處理"""
+        self.builder = BinaryPayloadBuilder(**self._order)
+        add_func = getattr(self.builder, self._AddFuncName)
+        add_func(val)
+
         if self._pType.IsRegister:
             return self.builder.to_registers()
         else:
-            if self._add_by_bits:
-                return self.builder.to_coils()[-1]
-            else:
-                return self.builder.to_coils()
+            return self.builder.to_coils()
 
-    def Decode(self, binary):
+    def _DecoderDecode(self, binary):
         if self._pType.IsRegister:
             self.decoder = BinaryPayloadDecoder.fromRegisters(binary, **self._order)
         else:
             self.decoder = BinaryPayloadDecoder.fromCoils(binary, **self._order)
-        
+
         decode_func = getattr(self.decoder, self._DecodeFuncName)
-        val = decode_func()
-        if self._add_by_bits:
-            return val[0]
-        else:
-            return val
\ No newline at end of file
+        return decode_func()
@@ -8,6 +8,8 @@ from .pymodbus import ModbusTarget
 class HslModbusTcpSource(SourceBase):
     _default_slave_id = 0x01
     _default_port = None
+    _default_timeout_sec = 3.
+    _default_pipeline_depth = 1
 
     def __init__(
             self, ip, port, address, target, desc=None,
@@ -17,6 +19,10 @@ class HslModbusTcpSource(SourceBase):
             addr_start_from=None,
             formula_x_str: str = None,
             is_writable: bool = False,
+            poll_sec: float = None,
+            poll_priority: int = 0,
+            deadband: float = None,
+            deadband_pct: float = None,
     ) -> None:
 
         super().__init__(ip, port, address, target, desc=desc)
@@ -26,11 +32,19 @@ class HslModbusTcpSource(SourceBase):
         self.addr_start_from = addr_start_from if addr_start_from else self.target.addr_start_from
         self.formula_x_str = formula_x_str
         self.is_writable = bool(is_writable)
+        self.poll_sec = float(poll_sec) if poll_sec else None
+        self.poll_priority = int(poll_priority)
+        self.deadband = float(deadband) if deadband else None
+        self.deadband_pct = float(deadband_pct) if deadband_pct else None
 
         self._PreCheck()
 
         self.client = ModbusTcpNet(self.ip, self.port, self.slave_id)
         self.client.isAddressStartWithZero = not self.addr_start_from
+        # 無法連線的設備最多只佔用 timeout 秒，不會卡住其他設備的連線/讀取
+        self.client.connectTimeOut = int(__class__._default_timeout_sec * 1000)
+        self.client.receiveTimeOut = int(__class__._default_timeout_sec * 1000)
+        self.client.pipelineDepth = int(__class__._default_pipeline_depth)
         self.is_connected = False
         self._SetTrans()
 
@@ -84,6 +98,10 @@ class HslModbusTcpSource(SourceBase):
             addr_start_from=kw.get('addr_start_from'),
             formula_x_str=kw.get('formulaX'),
             is_writable=is_writable,
+            poll_sec=kw.get('source_poll_sec'),
+            poll_priority=kw.get('source_poll_priority'),
+            deadband=kw.get('source_deadband'),
+            deadband_pct=kw.get('source_deadband_pct'),
             desc=kw.get('source_desc'),
         )
         return cls(**kwargs)
@@ -110,7 +128,7 @@ class HslModbusTcpSource(SourceBase):
         else:
             return 0
 
-    def RequestStr(self, attr_name='fx', index=-1):
+    def RequestStr(self, attr_name='fx', index=-1, address=None):
         fx = getattr(self.pointType, attr_name)
         if isinstance(fx, list):
             fx = fx[index]
@@ -118,7 +136,7 @@ class HslModbusTcpSource(SourceBase):
         _str = f'x={fx}'
         if self.slave_id:
             _str += f';s={self.slave_id}'
-        _str += f';{self.address}'
+        _str += f';{self.address if address is None else address}'
         return _str
 
     def _ReadWriteTrans(self, func_str):
@@ -166,17 +184,66 @@ class HslModbusTcpSource(SourceBase):
     def Read(self):
         res = self.client.Read(self.RequestStr('fx'), self._ReadLength)
         if res.IsSuccess:
-            val = self._ReadTrans(res.Content, index=0)
-            if self.dataType.basic_type_str == 'bits':
-                self.values = [val]
-            else:
-                self.values = self.dataType.Encode(val)
-
+            self._SetReadValue(self._ReadTrans(res.Content, index=0))
             return 1, self.values
         else:
             self.values = None
             return 0, res.ToMessageShowString()
 
+    def _SetReadValue(self, val):
+        if self.dataType.basic_type_str == 'bits':
+            self.values = [val]
+        else:
+            self.values = self.dataType.Encode(val)
+
+    @property
+    def client_key(self):
+        """每個 source 各自擁有 ModbusTcpNet (資料格式設定在 client 上)，不與其他 source 共用"""
+        return (__class__.__name__, self.ip, self.port, self.slave_id, id(self.client))
+
+    @property
+    def block_key(self):
+        """coil/discrete input 僅 bool 可由區塊位元切出，其餘型別不合併讀取"""
+        if not self.pointType.IsRegister and self.dataType.basic_type_str != 'bits':
+            return None
+        return (__class__.__name__, self.ip, self.port, self.slave_id, self.pointType.type_str)
+
+    @property
+    def pipeline_key(self):
+        """pipelineDepth > 1 時，同一設備 (ip, port) 的讀取區塊可在同一條連線上流水線送出"""
+        if self.client.pipelineDepth <= 1:
+            return None
+        return (__class__.__name__, self.ip, self.port)
+
+    def PipelineRead(self, ranges):
+        """以本 source 的連線一次送出多個區塊讀取 (依 transaction id 配對響應)
+        ranges: [(head, address_from0, count), ...]，head 決定 slave_id/pointType
+        Return: [(1, content) | (0, info), ...]，順序同 ranges
+        """
+        requests = [
+            (head.RequestStr('fx', address=start + self.addr_start_from), count)
+            for head, start, count in ranges
+        ]
+        return [
+            (1, res.Content) if res.IsSuccess else (0, res.ToMessageShowString())
+            for res in self.client.ReadPipelined(requests)
+        ]
+
+    def BlockRead(self, address_from0: int, count: int):
+        address = address_from0 + self.addr_start_from
+        res = self.client.Read(self.RequestStr('fx', address=address), count)
+        if res.IsSuccess:
+            return 1, res.Content
+        else:
+            return 0, res.ToMessageShowString()
+
+    def SetBlockValues(self, block_values, offset: int):
+        if self.pointType.IsRegister:
+            val = self._ReadTrans(block_values, index=offset * 2)
+        else:
+            val = (block_values[offset // 8] >> (offset % 8)) & 0x01 == 0x01
+        self._SetReadValue(val)
+
     def Write(self, values):
         if self.is_writable:
             try:
@@ -34,15 +34,26 @@ class NetworkBase:
 		super().__init__()
 		self.Token = uuid.UUID('{00000000-0000-0000-0000-000000000000}')
 		self.CoreSocket = None
+		self.isNoDelay = True
+		self.isKeepAlive = True
+		self.keepAliveIdle = 30000
+		self.keepAliveInterval = 10000
+		self.keepAliveCount = 3
 	def Receive(self,socket,length):
 		'''接收固定长度的字节数组'''
+		data = bytearray(length)
+		return self.ReceiveInto( socket, memoryview(data), data )
+	def ReceiveInto(self,socket,view,content = None):
+		'''以 recv_into 直接接收数据填满 view (预先分配的缓存)，成功时返回 content'''
 		totle = 0
-		data = bytearray()
+		length = len(view)
 		try:
 			while totle < length:
-				data.extend( socket.recv( length-totle ))
-				totle = len(data)
-			return OperateResult.CreateSuccessResult(data)
+				count = socket.recv_into( view[totle:] )
+				# 对方已关闭连接，recv 会一直返回空数据
+				if count == 0: raise ConnectionError( 'Remote closed the connection' )
+				totle += count
+			return OperateResult.CreateSuccessResult(content)
 		except Exception as e:
 			result = OperateResult()
 			result.Message = str(e)
@@ -56,16 +67,36 @@ class NetworkBase:
 			return OperateResult( msg = str(e))
 
 	def CreateSocketAndConnect(self,ipAddress,port,timeout = 10000):
-		'''创建一个新的socket对象并连接到远程的地址，默认超时时间为10秒钟'''
+		'''创建一个新的socket对象并连接到远程的地址，默认超时时间为10秒钟，timeout 小于等于0时不限制'''
+		socketTmp = None
 		try:
 			socketTmp = socket.socket()
+			if timeout > 0: socketTmp.settimeout( timeout / 1000 )
 			socketTmp.connect((ipAddress,port))
+			# 超时只作用于连接，接收的超时由 ReceiveMessage 设定
+			socketTmp.settimeout( None )
+			self.SetSocketOption( socketTmp )
 			return OperateResult.CreateSuccessResult(socketTmp)
 		except Exception as e:
+			if socketTmp != None: socketTmp.close()
 			return OperateResult( msg = str(e))
+	def SetSocketOption( self, sock ):
+		'''设置 TCP_NODELAY 及 keepalive，keepalive 的时间参数仅在平台支持时设置'''
+		if self.isNoDelay:
+			sock.setsockopt( socket.IPPROTO_TCP, socket.TCP_NODELAY, 1 )
+		if self.isKeepAlive:
+			sock.setsockopt( socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1 )
+			for name, value in (
+				('TCP_KEEPIDLE', self.keepAliveIdle // 1000),
+				('TCP_KEEPINTVL', self.keepAliveInterval // 1000),
+				('TCP_KEEPCNT', self.keepAliveCount),
+			):
+				if hasattr( socket, name ) and value > 0:
+					sock.setsockopt( socket.IPPROTO_TCP, getattr( socket, name ), value )
 	def ReceiveMessage( self, socket, timeOut, netMsg ):
-		'''接收一条完整的数据，使用异步接收完成，包含了指令头信息'''
+		'''接收一条完整的数据，使用异步接收完成，包含了指令头信息，timeOut 小于等于0时不限制'''
 		result = OperateResult()
+		socket.settimeout( timeOut / 1000 if timeOut > 0 else None )
 		headResult = self.Receive( socket, netMsg.ProtocolHeadBytesLength() )
 		if headResult.IsSuccess == False:
 			result.CopyErrorFromOther(headResult)
@@ -77,17 +108,19 @@ class NetworkBase:
 			result.Message = StringResources.Language.TokenCheckFailed
 			return result
 
-		contentLength = netMsg.GetContentLengthByHeadBytes( )
-		if contentLength == 0:
-			netMsg.ContentBytes = bytearray(0)
-		else:
-			contentResult = self.Receive( socket, contentLength )
+		# 头子节与内容接收到同一个 frame 缓存中，HeadBytes/ContentBytes 为其 memoryview，不再另外拼接
+		headLength = len(netMsg.HeadBytes)
+		contentLength = max( netMsg.GetContentLengthByHeadBytes( ), 0 )
+		frame = bytearray(headLength + contentLength)
+		frame[0:headLength] = netMsg.HeadBytes
+		view = memoryview(frame)
+		if contentLength > 0:
+			contentResult = self.ReceiveInto( socket, view[headLength:] )
 			if contentResult.IsSuccess == False:
 				result.CopyErrorFromOther( contentResult )
 				return result
-			netMsg.ContentBytes = contentResult.Content
-		
-		if netMsg.ContentBytes == None: netMsg.ContentBytes = bytearray(0)
+		netMsg.HeadBytes = view[:headLength]
+		netMsg.ContentBytes = view[headLength:]
 		result.Content = netMsg
 		result.IsSuccess = True
 		return result
@@ -215,6 +248,7 @@ class NetworkDoubleBase(NetworkBase):
 		self.isPersistentConn = False
 		self.isSocketError = False
 		self.receiveTimeOut = 10000
+		self.connectTimeOut = 10000
 		self.isUseSpecifiedSocket = False
 		self.interactiveLock = threading.Lock()
 		self.iNetMessage = INetMessage()
@@ -292,7 +326,7 @@ class NetworkDoubleBase(NetworkBase):
 
 	def CreateSocketAndInitialication( self ):
 		'''连接并初始化网络套接字'''
-		result = self.CreateSocketAndConnect( self.ipAddress, self.port, 10000 )
+		result = self.CreateSocketAndConnect( self.ipAddress, self.port, self.connectTimeOut )
 		if result.IsSuccess:
 			# 初始化
 			initi = self.InitializationOnConnect( result.Content )
@@ -307,6 +341,10 @@ class NetworkDoubleBase(NetworkBase):
 		read = self.ReadFromCoreServerBase( socket, send )
 		if read.IsSuccess == False: return OperateResult.CreateFailedResult( read )
 
+		# 由 ReceiveMessage 接收的头子节与内容本来就相连，直接返回整个 frame
+		if isinstance( read.Content1, memoryview ) and isinstance( read.Content2, memoryview ) and read.Content1.obj is read.Content2.obj:
+			return OperateResult.CreateSuccessResult( read.Content1.obj )
+
 		# 拼接结果数据
 		Content = bytearray(len(read.Content1) + len(read.Content2))
 		if len(read.Content1) > 0 : 
@@ -355,7 +393,7 @@ class NetworkDoubleBase(NetworkBase):
 		# 接收超时时间大于0时才允许接收远程的数据
 		if (self.receiveTimeOut >= 0):
 			# 接收数据信息
-			resultReceive = self.ReceiveMessage(socket, 10000, self.iNetMessage)
+			resultReceive = self.ReceiveMessage(socket, self.receiveTimeOut, self.iNetMessage)
 			if resultReceive.IsSuccess == False:
 				socket.close( )
 				return OperateResult( msg = "Receive data timeout: " + str(self.receiveTimeOut ) + " Msg:"+ resultReceive.Message)
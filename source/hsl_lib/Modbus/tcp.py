@@ -20,6 +20,8 @@ class ModbusTcpNet(NetworkDeviceBase):
 		self.port = port
 		self.byteTransform = ReverseWordTransform()
 		self.iNetMessage = ModbusTcpMessage()
+		# 长连接下同时未回应的请求数上限，1 为不使用流水线
+		self.pipelineDepth = 1
 	def SetDataFormat( self, value ):
 		'''多字节的数据是否高低位反转，该设置的改变会影响Int32,UInt32,float,double,Int64,UInt64类型的读写'''
 		self.byteTransform.DataFormat = value
@@ -108,7 +110,9 @@ class ModbusTcpNet(NetworkDeviceBase):
 		return OperateResult.CreateSuccessResult( buffer )
 	def CheckModbusTcpResponse( self, send ):
 		'''检查当前的Modbus-Tcp响应是否是正确的'''
-		resultBytes = self.ReadFromCoreServer( send )
+		return self.CheckModbusTcpResult( send, self.ReadFromCoreServer( send ) )
+	def CheckModbusTcpResult( self, send, resultBytes ):
+		'''检查 send 对应的响应 resultBytes 是否为异常码'''
 		if resultBytes.IsSuccess == True:
 			if (send[7] + 0x80) == resultBytes.Content[7]:
 				# 发生了错误
@@ -135,9 +139,8 @@ class ModbusTcpNet(NetworkDeviceBase):
 		if resultBytes.IsSuccess == True:
 			# 二次数据处理
 			if len(resultBytes.Content) >= 9:
-				buffer = bytearray(len(resultBytes.Content) - 9)
-				buffer[0:len(buffer)] = resultBytes.Content[9:]
-				resultBytes.Content = buffer
+				# 以 memoryview 去掉 9 个字节的头，不复制数据
+				resultBytes.Content = memoryview(resultBytes.Content)[9:]
 		return resultBytes
 	def ReadModBusAddressBase( self, address, length = 1 ):
 		'''读取服务器的数据，需要指定不同的功能码'''
@@ -148,9 +151,8 @@ class ModbusTcpNet(NetworkDeviceBase):
 		if resultBytes.IsSuccess == True:
 			# 二次数据处理
 			if len(resultBytes.Content) >= 9:
-				buffer = bytearray(len(resultBytes.Content) - 9)
-				buffer[0:len(buffer)] = resultBytes.Content[9:]
-				resultBytes.Content = buffer
+				# 以 memoryview 去掉 9 个字节的头，不复制数据
+				resultBytes.Content = memoryview(resultBytes.Content)[9:]
 		return resultBytes
 	def ReadCoil( self, address, length = None):
 		'''批量的读取线圈，需要指定起始地址，读取长度可选'''
@@ -179,6 +181,74 @@ class ModbusTcpNet(NetworkDeviceBase):
 		analysis = ModbusInfo.AnalysisReadAddress( address, self.isAddressStartWithZero )
 		if analysis.IsSuccess == False : return OperateResult.CreateFailedResult( analysis )
 		return self.ReadModBusAddressBase( analysis.Content, length )
+	def ReadPipelined( self, requests ):
+		'''批量读取 requests: [(address, length), ...]，返回顺序相同的结果列表（内容同 Read）
+		pipelineDepth 大于1且为长连接时，在同一连接上同时送出多个请求并依 transaction id 配对响应，否则逐一读取'''
+		if self.pipelineDepth <= 1 or self.isPersistentConn == False:
+			return [self.Read( address, length ) for address, length in requests]
+
+		results = [None] * len(requests)
+		commands = []
+		for i, (address, length) in enumerate(requests):
+			analysis = ModbusInfo.AnalysisReadAddress( address, self.isAddressStartWithZero )
+			if analysis.IsSuccess == False:
+				results[i] = OperateResult.CreateFailedResult( analysis )
+				continue
+			command = self.BuildReadModbusAddressCommand( analysis.Content, length )
+			if command.IsSuccess == False:
+				results[i] = OperateResult.CreateFailedResult( command )
+				continue
+			commands.append( (i, command.Content) )
+
+		reads = self.ReadFromCoreServerPipelined( [send for _, send in commands] )
+		for (i, send), read in zip( commands, reads ):
+			resultBytes = self.CheckModbusTcpResult( send, read )
+			if resultBytes.IsSuccess == True and len(resultBytes.Content) >= 9:
+				resultBytes.Content = memoryview(resultBytes.Content)[9:]
+			results[i] = resultBytes
+		return results
+	def ReadFromCoreServerPipelined( self, sends ):
+		'''在长连接上连续发送 sends，最多 pipelineDepth 个未响应，依头子节的消息标识 (transaction id) 配对响应
+		返回与 sends 顺序相同的结果；连接出错时其余尚未完成的请求皆为失败'''
+		results = [None] * len(sends)
+		self.interactiveLock.acquire()
+		try:
+			resultSocket = self.GetAvailableSocket( )
+			if resultSocket.IsSuccess == False:
+				self.isSocketError = True
+				return [OperateResult.CreateFailedResult( resultSocket ) for _ in sends]
+
+			socket = resultSocket.Content
+			pending = {}
+			nextIndex = 0
+			while nextIndex < len(sends) or len(pending) > 0:
+				while nextIndex < len(sends) and len(pending) < self.pipelineDepth:
+					send = sends[nextIndex]
+					sendResult = self.Send( socket, send )
+					if sendResult.IsSuccess == False:
+						return self.PipelineFailed( socket, results, sendResult.Message )
+					pending[send[0] * 256 + send[1]] = nextIndex
+					nextIndex += 1
+
+				netMsg = ModbusTcpMessage()
+				receive = self.ReceiveMessage( socket, self.receiveTimeOut, netMsg )
+				if receive.IsSuccess == False:
+					return self.PipelineFailed( socket, results, "Receive data timeout: " + str(self.receiveTimeOut ) + " Msg:" + receive.Message )
+
+				# 不在等待中的消息标识 (例如先前逾时的响应) 直接丢弃
+				index = pending.pop( netMsg.GetHeadBytesIdentity(), None )
+				if index != None:
+					results[index] = OperateResult.CreateSuccessResult( netMsg.HeadBytes.obj )
+
+			self.isSocketError = False
+			return results
+		finally:
+			self.interactiveLock.release()
+	def PipelineFailed( self, socket, results, message ):
+		'''流水线中连接出错：关闭连接，尚未完成的请求皆以 message 失败'''
+		self.isSocketError = True
+		socket.close( )
+		return [result if result != None else OperateResult( msg = message ) for result in results]
 	def WriteOneRegister( self, address, value ):
 		'''写一个寄存器数据'''
 		if type(value) == list:
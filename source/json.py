@@ -12,6 +12,10 @@ class JsonSource(SourcePairBase):
                  point_type_str: str = None,
                  data_type_str: str = None,
                  formula_x_str: str = None,
+                 poll_sec: float = None,
+                 poll_priority: int = 0,
+                 deadband: float = None,
+                 deadband_pct: float = None,
                  desc=None,
                  values=None):
         super().__init__(
@@ -24,6 +28,10 @@ class JsonSource(SourcePairBase):
         self.dataType = DataType(
             data_type_str, self.pointType) if data_type_str else self.target.dataType
         self.formula_x_str = formula_x_str
+        self.poll_sec = float(poll_sec) if poll_sec else None
+        self.poll_priority = int(poll_priority)
+        self.deadband = float(deadband) if deadband else None
+        self.deadband_pct = float(deadband_pct) if deadband_pct else None
         self.values = values
 
     def __repr__(self) -> str:
@@ -49,6 +57,10 @@ class JsonSource(SourcePairBase):
             point_type_str=source_kw.get('source_pointtype'),
             data_type_str=source_kw.get('source_dataype'),
             formula_x_str=source_kw.get('formulaX'),
+            poll_sec=source_kw.get('source_poll_sec'),
+            poll_priority=source_kw.get('source_poll_priority'),
+            deadband=source_kw.get('source_deadband'),
+            deadband_pct=source_kw.get('source_deadband_pct'),
             desc=source_kw.get('source_desc')
         )
         return cls(**kwargs)
@@ -126,6 +138,10 @@ class JsonSource(SourcePairBase):
 class JsonClient(ClientBase):
     def __init__(self, filepath):
         self.filepath = Path(filepath)
+        self._key = (__class__.__name__, str(self.filepath.resolve()))
+
+    @property
+    def key(self): return self._key
 
     def __eq__(self, o) -> bool:
         if not isinstance(o, JsonClient):
@@ -2,7 +2,10 @@ import csv
 import sqlite3
 import os.path
 from collections import Counter
+from threading import RLock
 from .status import SourceStatus
+from .poll import PollGroup
+from .address_index import AddressIndex
 from model.address import Address
 
 
@@ -10,66 +13,103 @@ class MirrorSourceList(list):
     def __init__(self, *args, mirror):
         super().__init__()
         self.mirror = mirror
+        self.poll_groups = {}
+        # client_key -> 共用該 client 的 sources
+        self.clients = {}
+        self.address_index = AddressIndex()
+        # (target unit_id, write fx, target address_from0) -> sources，供 writeback 查詢
+        self.write_routes = {}
+        # 各狀態的 sources 索引 (dict 作為有序集合: id(src) -> src)，由 set_status 維護
+        self._by_status = {status: {} for status in SourceStatus}
+        self._lock = RLock()
         # for arg in args:
         #     self.append(arg)
 
     def append(self, new_src):
         if self.mirror._Validate(new_src) is not -1:
             super().append(new_src)
-            new_src.status = SourceStatus.MIRRORED
+            self.address_index.Add(new_src)
+            for fx in new_src.target.pointType.write_fx:
+                self.write_routes.setdefault((new_src.target.unit_id, fx, new_src.target.address_from0), []).append(new_src)
+            self.set_status(new_src, SourceStatus.MIRRORED)
+
+            client_key = new_src.client_key
+            if client_key in self.clients:
+                new_src.client = self.clients[client_key][0].client
+            else:
+                self.clients[client_key] = []
+            self.clients[client_key].append(new_src)
+
+            group_key = (new_src.poll_sec, new_src.poll_priority)
+            if group_key not in self.poll_groups:
+                self.poll_groups[group_key] = PollGroup(*group_key)
+            self.poll_groups[group_key].sources.append(new_src)
+
+    def set_status(self, src, status):
+        """所有狀態轉換的入口，同步更新 src.status 與狀態索引"""
+        with self._lock:
+            self._by_status[src.status].pop(id(src), None)
+            src.status = status
+            self._by_status[status][id(src)] = src
 
-            for src in self:
-                if src.client == new_src.client:
-                    new_src.client = src.client
-                    break
+    def _with_status(self, *status_list) -> list:
+        with self._lock:
+            return [src for status in status_list for src in self._by_status[status].values()]
 
     def reset(self, src):
-        src.status = SourceStatus.NOT_STARTED
+        self.set_status(src, SourceStatus.NOT_STARTED)
 
     @property
     def wait_connect(self):
-        return [src for src in self if src.status.wait_connect]
+        return self._with_status(SourceStatus.MIRRORED, SourceStatus.NOT_STARTED)
 
     @property
     def wait_retry(self):
-        return [src for src in self if src.status == SourceStatus.CONNECTED_FAILED]
+        return self._with_status(SourceStatus.CONNECTED_FAILED)
 
     @property
     def retry_failed(self):
-        return [src for src in self if src.status == SourceStatus.RETRY_FAILED]
+        return self._with_status(SourceStatus.RETRY_FAILED)
+
+    def client_sources(self, src) -> list:
+        """與 src 共用同個 Client 的所有 sources (包含 src 本身)"""
+        return self.clients[src.client_key]
 
     def set_connected(self, connected_src):
         """ 將已連線的 src, 及共用同個 Client 的其他 src 狀態設為 CONNECTED"""
-        for src in self:
-            if src.client == connected_src.client:
-                src.status = SourceStatus.CONNECTED
+        for src in self.client_sources(connected_src):
+            self.set_status(src, SourceStatus.CONNECTED)
 
     def set_connect_failed(self, failed_src):
-        for src in self:
-            if src.client == failed_src.client:
-                src.status = SourceStatus.CONNECTED_FAILED
+        for src in self.client_sources(failed_src):
+            self.set_status(src, SourceStatus.CONNECTED_FAILED)
 
     def set_retry_failed(self, failed_src):
-        for src in self:
-            if src.client == failed_src.client:
-                src.status = SourceStatus.RETRY_FAILED
+        for src in self.client_sources(failed_src):
+            self.set_status(src, SourceStatus.RETRY_FAILED)
 
     @property
     def wait_read(self):
-        return [src for src in self if src.status.wait_read]
+        return self._with_status(
+            SourceStatus.CONNECTED, SourceStatus.READING, SourceStatus.READING_FAILED_RECOVER)
+
+    def due_poll_groups(self, now, tolerance=0.) -> list:
+        """已到期的輪詢群組，依 priority 由高到低排序"""
+        groups = sorted(self.poll_groups.values(), key=lambda group: -group.priority)
+        return [group for group in groups if group.Due(now, tolerance)]
 
     def set_reading(self, src):
-        src.status = SourceStatus.READING
+        self.set_status(src, SourceStatus.READING)
 
     def set_read_failed(self, src):
-        src.status = SourceStatus.READING_FAILED
+        self.set_status(src, SourceStatus.READING_FAILED)
 
     @property
     def read_failed(self):
-        return [src for src in self if src.status == SourceStatus.READING_FAILED]
+        return self._with_status(SourceStatus.READING_FAILED)
 
     def set_readfail_recover(self, src):
-        src.status = SourceStatus.READING_FAILED_RECOVER
+        self.set_status(src, SourceStatus.READING_FAILED_RECOVER)
 
     @property
     def counter(self):
@@ -86,18 +126,14 @@ class MirrorSourceList(list):
 
     @property
     def client_list(self) -> list:
-        _list = []
-        for src in self:
-            if src.client not in _list:
-                _list.append(src.client)
-        return _list
+        return [sources[0].client for sources in self.clients.values()]
 
     @property
     def status(self) -> list:
         counter = Counter()
         mixed_dict = {}
-        for client in self.client_list:
-            sources = [src for src in self if src.client == client]
+        for sources in self.clients.values():
+            client = sources[0].client
             src_counter = Counter([src.status.name for src in sources])
             if len(src_counter) == 1:
                 counter.update([sources[0].status.name])
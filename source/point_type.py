@@ -39,6 +39,16 @@ class PointType:
     @property
     def IsRegister(self): return self.type_str in ['hr', 'ir']
 
+    @property
+    def MaxReadCount(self):
+        """單次讀取請求的數量上限 (Modbus PDU: 125 registers / 2000 coils)"""
+        return 125 if self.IsRegister else 2000
+
+    @property
+    def MaxWriteCount(self):
+        """單次寫入請求的數量上限 (FC16: 123 registers / FC15: 1968 coils)"""
+        return 123 if self.IsRegister else 1968
+
     def _RequestFunc(self, client):
         req = dict(
             co=client.read_coils,
@@ -0,0 +1,36 @@
+class PollGroup:
+    """輪詢群組 (scan class)：輪詢週期 poll_sec 與優先權 priority 相同的 sources
+        - 各群組擁有獨立的截止時間，跨設備各自排程
+        - poll_sec 為 None 時，每次 Read 都讀取
+        - priority 越大越先讀取
+    """
+    def __init__(self, poll_sec: float = None, priority: int = 0):
+        self.poll_sec = poll_sec
+        self.priority = int(priority)
+        self.sources = []
+        self.poll_count = 0
+        self._next_poll = None
+
+    def __repr__(self):
+        return f'<{__class__.__name__} poll={self.poll_sec} priority={self.priority} *{len(self.sources)}>'
+
+    def __iter__(self): return iter(self.sources)
+    def __len__(self): return len(self.sources)
+
+    @property
+    def key(self): return (self.poll_sec, self.priority)
+
+    def Due(self, now, tolerance=0.):
+        """已到期時推進下一次截止時間並返回 True；tolerance 內的提前量視為到期"""
+        if self.poll_sec is not None:
+            if self._next_poll is None:
+                self._next_poll = now
+            if now + tolerance < self._next_poll:
+                return False
+
+            self._next_poll += self.poll_sec
+            if self._next_poll <= now:
+                self._next_poll = now + self.poll_sec
+
+        self.poll_count += 1
+        return True
@@ -17,6 +17,10 @@ class PyModbusTcpSource(SourcePairBase):
             addr_start_from=None,
             formula_x_str: str = None,
             is_writable: bool = False,
+            poll_sec: float = None,
+            poll_priority: int = 0,
+            deadband: float = None,
+            deadband_pct: float = None,
     ) -> None:
 
         super().__init__(client, target, desc)
@@ -29,6 +33,11 @@ class PyModbusTcpSource(SourcePairBase):
         self.addr_start_from = addr_start_from if addr_start_from else self.target.addr_start_from
         self.formula_x_str = formula_x_str
         self.is_writable = bool(is_writable)
+        self.poll_sec = float(poll_sec) if poll_sec else None
+        self.poll_priority = int(poll_priority)
+        # deadband: 數值變動未超過 max(deadband, |上次數值| * deadband_pct%) 時不更新 server
+        self.deadband = float(deadband) if deadband else None
+        self.deadband_pct = float(deadband_pct) if deadband_pct else None
 
         self._PreCheck()
 
@@ -79,6 +88,10 @@ class PyModbusTcpSource(SourcePairBase):
             addr_start_from=source_kw.get('addr_start_from'),
             formula_x_str=source_kw.get('formulaX'),
             is_writable=is_writable,
+            poll_sec=source_kw.get('source_poll_sec'),
+            poll_priority=source_kw.get('source_poll_priority'),
+            deadband=source_kw.get('source_deadband'),
+            deadband_pct=source_kw.get('source_deadband_pct'),
             desc=source_kw.get('source_desc'),
         )
         return cls(**kwargs)
@@ -93,6 +106,20 @@ class PyModbusTcpSource(SourcePairBase):
             self.values = None
             return 0, val
 
+    @property
+    def block_key(self):
+        """共用同一個 client/slave_id/pointType 的 sources 可合併讀取"""
+        return (id(self.client), self.slave_id, self.pointType.type_str)
+
+    def BlockRead(self, address_from0: int, count: int):
+        return self.client.Read(self.pointType, address_from0, count, self.slave_id)
+
+    def SetBlockValues(self, block_values, offset: int):
+        self.values = block_values[offset:offset + len(self)]
+
+    def BlockWrite(self, address_from0: int, values):
+        return self.client.Write(values, self.pointType, address_from0, self.slave_id)
+
     def Write(self, values):
         if self.is_writable:
             values = values[:len(self)]
@@ -161,6 +188,7 @@ class ModbusTarget(TargetBase):
     _default_datatype_str = None
     _default_abcd_str = None
     _default_addr_start_from = None
+    _default_unit_id = None
 
     def __init__(
             self,
@@ -169,12 +197,15 @@ class ModbusTarget(TargetBase):
             data_type_str,
             data_order,
             addr_start_from=1,
+            unit_id=0x00,
             desc=None
     ):
         self.address = int(address)
         self.pointType = PointType(point_type_str)
         self.dataType = DataType(data_type_str, self.pointType, **data_order.to_pymodbus)
         self.addr_start_from = addr_start_from
+        # server 端的 unit id (virtual slave)
+        self.unit_id = int(unit_id)
         self.desc = desc if desc else ''
 
     def _PreCheck(self):
@@ -217,6 +248,7 @@ class ModbusTarget(TargetBase):
             data_type_str=_get(kw, 'data_type', cls._default_datatype_str),
             data_order=EDataOrder[_get(kw, "abcd", cls._default_abcd_str)],
             addr_start_from=_get(kw, 'addr_start_from',cls._default_addr_start_from),
+            unit_id=_get(kw, 'target_unit_id', cls._default_unit_id),
             desc=kw.get('target_desc'),
         )
         return cls(**kwargs)
@@ -0,0 +1,94 @@
+import logging
+import socket
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+from pymodbus.datastore import ModbusSequentialDataBlock, ModbusServerContext, ModbusSlaveContext
+from pymodbus.server.sync import ModbusTcpServer
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from source import EDataOrder, ModbusTarget, PyModbusTcpClient, PyModbusTcpSource  # noqa: E402
+
+DEVICE_SIZE = 1000
+ADDRESS_HEADER = ('SourceProtocol,SourceIP,SourcePort,SourceDeviceID,SourcePointType,SourceAddress,SourceDataype,'
+                  'TargetAddress,DataType,FormulaX,TargetDesc,SourceDesc,SourcePollSec,SourcePollPriority,TargetUnitID,'
+                  'SourceDeadband,SourceDeadbandPct')
+
+
+@pytest.fixture(autouse=True)
+def target_defaults():
+    ModbusTarget._default_pointtype_str = 'hr'
+    ModbusTarget._default_datatype_str = 'uint16'
+    ModbusTarget._default_abcd_str = 'ABCD'
+    ModbusTarget._default_addr_start_from = 0
+    ModbusTarget._default_unit_id = 0
+    PyModbusTcpSource._default_port = 502
+    PyModbusTcpSource._default_slave_id = 1
+
+
+@pytest.fixture
+def logger():
+    return logging.getLogger('tests')
+
+
+@pytest.fixture
+def device():
+    """本機的 Modbus TCP 設備：hr/ir 的初始值為位址本身，coil 為 address % 3 == 0
+    Yield: (port, store)
+    """
+    store = ModbusSlaveContext(
+        hr=ModbusSequentialDataBlock(0, list(range(DEVICE_SIZE))),
+        ir=ModbusSequentialDataBlock(0, list(range(DEVICE_SIZE))),
+        co=ModbusSequentialDataBlock(0, [i % 3 == 0 for i in range(DEVICE_SIZE)]),
+        di=ModbusSequentialDataBlock(0, [i % 2 == 0 for i in range(DEVICE_SIZE)]),
+        zero_mode=True,
+    )
+    server = ModbusTcpServer(ModbusServerContext(slaves=store, single=True), address=('127.0.0.1', 0))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server.server_address[1], store
+    server.shutdown()
+    server.server_close()
+
+
+def make_source(port, address, target_address, point_type='hr', data_type='uint16',
+                target_data_type=None, is_writable=False, **kw):
+    """device 上 address 的 PyModbusTcpSource，對應到 target_address (型別預設與 source 相同)"""
+    target = ModbusTarget(target_address, point_type, target_data_type or data_type, EDataOrder.ABCD, addr_start_from=0)
+    client = PyModbusTcpClient('127.0.0.1', port)
+    return PyModbusTcpSource(client, target, address=address, point_type_str=point_type, data_type_str=data_type,
+                             addr_start_from=0, is_writable=is_writable, **kw)
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def make_ctrl(tmp_path, logger):
+    """以 address.csv 的資料列 (不含標題) 與 config 欄位建立 ModbusController (未 Start)"""
+    from controller import ModbusController
+    from model.config import Config
+
+    def make(rows, **config_kw):
+        address_path = tmp_path / 'address.csv'
+        address_path.write_text('\n'.join([
+            ADDRESS_HEADER,
+            ','.join(['---'] * len(ADDRESS_HEADER.split(','))),
+            *rows,
+        ]), encoding='utf-8')
+        config_kw.setdefault('addr_start_from', 0)
+        config = Config(
+            address_path=str(address_path),
+            register_folder=str(tmp_path / '.register'),
+            server_port=_free_port(),
+            **config_kw,
+        )
+        return ModbusController(config, logger=logger)
+
+    return make
@@ -0,0 +1,41 @@
+import logging
+
+from conftest import make_source
+from mirror_sync import SyncMirror
+from source import AddressIndex
+
+PORT = 502
+
+
+def test_conflict_checks_neighbouring_intervals():
+    index = AddressIndex()
+    for address, target_address in [(0, 0), (1, 4), (2, 8)]:
+        index.Add(make_source(PORT, address, target_address, data_type='float32'))
+    assert index.Conflict(make_source(PORT, 9, 2, data_type='float32').target) is None
+    assert index.Conflict(make_source(PORT, 9, 5).target) is not None
+    assert index.Conflict(make_source(PORT, 9, 7, data_type='float32').target) is not None
+    assert index.Conflict(make_source(PORT, 9, 0, point_type='co', data_type='bool').target) is None
+
+
+def test_find_conflicts_keeps_first_in_list_order():
+    first = make_source(PORT, 0, 10, data_type='float32')
+    overlapping = make_source(PORT, 1, 9, data_type='float32')
+    # 只與被拒絕的 overlapping 重疊，仍可加入
+    after = make_source(PORT, 2, 8)
+    assert AddressIndex.FindConflicts([first, overlapping, after]) == [(overlapping, first)]
+
+
+def test_segments_merge_adjacent_intervals():
+    index = AddressIndex()
+    for target_address in [0, 1, 3, 10]:
+        index.Add(make_source(PORT, 0, target_address))
+    assert index.Segments() == {0: {'hr': [(0, 2), (3, 4), (10, 11)]}}
+    assert index.Segments(gap=1) == {0: {'hr': [(0, 4), (10, 11)]}}
+
+
+def test_mirror_reports_all_conflicts_at_load(caplog):
+    sources = [make_source(PORT, i, target_address) for i, target_address in enumerate([0, 0, 1, 1, 2])]
+    with caplog.at_level(logging.WARNING, logger='tests'):
+        mirror = SyncMirror(sources, logging.getLogger('tests'))
+    assert list(mirror.src_list) == [sources[0], sources[2], sources[4]]
+    assert sum('Address conflict' in record.message for record in caplog.records) == 2
@@ -0,0 +1,64 @@
+from conftest import DEVICE_SIZE, make_source
+from mirror_sync import SyncMirror
+from source import ReadPlanner
+
+
+def _shared(sources):
+    """同一設備的 sources 共用 client (同 MirrorSourceList.append)"""
+    for src in sources[1:]:
+        src.client = sources[0].client
+    return sources
+
+
+def test_planner_merges_adjacent_sources(device):
+    port, _ = device
+    sources = _shared([make_source(port, address, i) for i, address in enumerate([12, 10, 11, 20])])
+    blocks = ReadPlanner().Plan(sources)
+    assert sorted((block.start, block.end, len(block)) for block in blocks) == [(10, 13, 3), (20, 21, 1)]
+
+
+def test_planner_gap_and_max_count(device):
+    port, _ = device
+    sources = _shared([make_source(port, 0, 0), make_source(port, 3, 1), make_source(port, 200, 2)])
+    assert len(ReadPlanner(max_gap=2).Plan(sources)) == 2
+    assert len(ReadPlanner(max_gap=1).Plan(sources)) == 3
+    # 合併後超過單次讀取上限 (125 registers) 則分開
+    assert len(ReadPlanner(max_gap=500).Plan(sources)) == 2
+
+
+def test_planner_disabled_and_other_point_types(device):
+    port, _ = device
+    sources = _shared([make_source(port, 0, 0), make_source(port, 1, 1), make_source(port, 2, 0, point_type='co', data_type='bool')])
+    assert len(ReadPlanner().Plan(sources)) == 2
+    assert len(ReadPlanner(enabled=False).Plan(sources)) == 3
+
+
+def test_block_read_slices_values(device, logger):
+    port, store = device
+    store.setValues(3, 5, [0x4120, 0x0000])
+    sources = [
+        make_source(port, 3, 0),
+        make_source(port, 4, 1, data_type='int16'),
+        make_source(port, 5, 2, data_type='float32'),
+        make_source(port, 9, 4, point_type='co', data_type='bool'),
+        make_source(port, 10, 5, point_type='co', data_type='bool'),
+    ]
+    mirror = SyncMirror(sources, logger)
+    mirror.connect_all()
+    mirror.Read()
+    assert [src.values for src in sources] == [[3], [4], [0x4120, 0x0000], [True], [False]]
+    assert all(src.status.wait_read for src in sources)
+    mirror.Disconnect()
+
+
+def test_failed_block_falls_back_to_each_source(device, logger):
+    port, _ = device
+    good = make_source(port, DEVICE_SIZE - 1, 0)
+    bad = make_source(port, DEVICE_SIZE, 1)
+    mirror = SyncMirror([good, bad], logger)
+    mirror.connect_all()
+    mirror.Read()
+    assert good.values == [DEVICE_SIZE - 1]
+    assert good.status.wait_read
+    assert bad in mirror.src_list.read_failed
+    mirror.Disconnect()
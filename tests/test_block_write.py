@@ -0,0 +1,63 @@
+import pytest
+
+from conftest import make_source
+from mirror_async import AsyncMirror
+from mirror_sync import SyncMirror
+from source import WriteBlock
+
+WRITE_REGISTERS = 16
+
+
+def _mirror(mirror_cls, sources, logger):
+    mirror = mirror_cls(sources, logger)
+    mirror.connect_all()
+    return mirror
+
+
+@pytest.mark.parametrize('mirror_cls', [SyncMirror, AsyncMirror])
+def test_consecutive_sources_merge_into_one_write(device, logger, mirror_cls):
+    port, store = device
+    sources = [make_source(port, 10 + i, i, is_writable=True) for i in range(3)]
+    mirror = _mirror(mirror_cls, sources, logger)
+
+    blocks = mirror._WritePlan(WRITE_REGISTERS, 0, [7, 8, 9])
+    assert [len(block) for block in blocks] == [3]
+    assert mirror.Write(WRITE_REGISTERS, 0, [7, 8, 9]) == 1
+    assert store.getValues(3, 9, 5) == [9, 7, 8, 9, 13]
+    assert [src.values for src in sources] == [[7], [8], [9]]
+    mirror.Disconnect()
+
+
+@pytest.mark.parametrize('mirror_cls', [SyncMirror, AsyncMirror])
+def test_source_shorter_than_target_is_not_merged(device, logger, mirror_cls):
+    """int16 sources 對應到 float32 targets：只寫入各 source 的 1 個 register，不越界寫到相鄰位址"""
+    port, store = device
+    sources = [
+        make_source(port, i, i * 2, data_type='int16', target_data_type='float32', is_writable=True)
+        for i in range(2)
+    ]
+    mirror = _mirror(mirror_cls, sources, logger)
+
+    assert [len(block) for block in mirror._WritePlan(WRITE_REGISTERS, 0, [11, 12, 21, 22])] == [1, 1]
+    assert mirror.Write(WRITE_REGISTERS, 0, [11, 12, 21, 22]) == 1
+    assert store.getValues(3, 0, 4) == [11, 21, 2, 3]
+    assert [src.values for src in sources] == [[11], [21]]
+    mirror.Disconnect()
+
+
+def test_block_values_are_cut_to_source_length(device):
+    port, _ = device
+    head = make_source(port, 0, 0, is_writable=True)
+    block = WriteBlock(head, [1, 2])
+    assert block.values == [1]
+    src = make_source(port, 1, 1, is_writable=True)
+    src.client = head.client
+    assert block.TryMerge(src, [3])
+    assert block.values == [1, 3]
+
+
+def test_read_only_source_is_not_merged(device):
+    port, _ = device
+    block = WriteBlock(make_source(port, 0, 0, is_writable=True), [1])
+    assert not block.TryMerge(make_source(port, 1, 1), [2])
+    assert not block.TryMerge(make_source(port, 2, 1, is_writable=True), [2])
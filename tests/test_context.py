@@ -0,0 +1,68 @@
+import pytest
+from pymodbus.exceptions import NoSuchSlaveException
+
+from pymodbus_context import (BitArrayBlock, LinkedSlaveContext, RegisterArrayBlock, SegmentedDataBlock,
+                              UnmappedAddressError)
+
+BLOCKS = [
+    lambda: RegisterArrayBlock(0, 16),
+    lambda: BitArrayBlock(0, 16),
+    lambda: SegmentedDataBlock([(0, 8), (10, 16)], RegisterArrayBlock),
+]
+
+
+def _value(block):
+    return True if isinstance(block, BitArrayBlock) else 7
+
+
+@pytest.mark.parametrize('make_block', BLOCKS)
+def test_staged_values_appear_on_publish(make_block):
+    block = make_block()
+    block.BeginSnapshot()
+    block.Stage(2, [_value(block)])
+    assert list(block.getValues(2, 1)) != [_value(block)]
+    block.PublishSnapshot()
+    assert list(block.getValues(2, 1)) == [_value(block)]
+
+
+@pytest.mark.parametrize('make_block', BLOCKS)
+def test_write_during_snapshot_is_kept(make_block):
+    """server 在 BeginSnapshot 與 PublishSnapshot 之間的寫入，發佈後不會被舊的複本覆蓋"""
+    block = make_block()
+    block.BeginSnapshot()
+    block.setValues(3, [_value(block)])
+    assert list(block.getValues(3, 1)) == [_value(block)]
+    block.PublishSnapshot()
+    assert list(block.getValues(3, 1)) == [_value(block)]
+
+
+def test_bit_block_packs_bits():
+    block = BitArrayBlock(0, 20)
+    block.setValues(5, [True, False, True])
+    assert block.getValues(4, 5) == [False, True, False, True, False]
+    assert len(block.values) == 3
+
+
+def test_segmented_block_validates_within_one_segment():
+    block = SegmentedDataBlock([(0, 8), (10, 16)], RegisterArrayBlock)
+    assert block.validate(0, 8)
+    assert block.validate(10, 6)
+    assert not block.validate(6, 5)
+    assert not block.validate(8)
+    assert block.size == 14
+
+
+@pytest.mark.parametrize('unmapped_error, raises', [
+    ('IllegalAddress', None),
+    ('SlaveFailure', UnmappedAddressError),
+    ('GatewayNoResponse', NoSuchSlaveException),
+])
+def test_unmapped_address(unmapped_error, raises):
+    context = LinkedSlaveContext.SlaveContext(
+        ctrl=None, zero_mode=True, segments={'hr': [(0, 4)]}, unmapped_error=unmapped_error)
+    assert context.validate(3, 0, 4)
+    if raises is None:
+        assert not context.validate(3, 4)
+    else:
+        with pytest.raises(raises):
+            context.validate(3, 4)
@@ -0,0 +1,98 @@
+import threading
+import time
+
+import pytest
+from pymodbus.exceptions import NoSuchSlaveException
+
+from controller import CtrlState
+
+
+def _wait_for(predicate, timeout=5.):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.05)
+    return True
+
+
+@pytest.fixture
+def ctrl(device, make_ctrl):
+    port, _ = device
+    ctrl = make_ctrl([f'modbus_tcp1,127.0.0.1,{port},1,hr,1,uint16,1,uint16,,,,,,,,'], mirror_refresh_sec=1.)
+    yield ctrl
+    if not ctrl.is_stopping:
+        ctrl.Stop()
+
+
+def test_lifecycle_idle_cpu_and_prompt_stop(ctrl):
+    main = threading.Thread(target=ctrl.Start, name='CtrlMain')
+    main.start()
+    assert _wait_for(lambda: ctrl.state is CtrlState.SERVING)
+    assert ctrl.mirror.src_list[0].values == [1]
+
+    # 等待期間以 Condition 阻塞，不應持續佔用 CPU
+    cpu_0 = time.process_time()
+    time.sleep(1.)
+    assert time.process_time() - cpu_0 < 0.1
+
+    t0 = time.monotonic()
+    ctrl.Stop()
+    main.join(timeout=2.)
+    assert not main.is_alive()
+    assert ctrl.state is CtrlState.STOPPED
+    assert time.monotonic() - t0 < 2.
+    assert _wait_for(lambda: not any(
+        thread.is_alive() for thread in threading.enumerate()
+        if thread.name in ('CtrlConnect', 'CtrlReadWrite', 'CtrlReadfailRecover')
+    ), timeout=2.)
+
+
+def test_stop_before_ready_does_not_start_server(ctrl):
+    ctrl._SetState(CtrlState.STOPPING)
+    ctrl.Start()
+    assert ctrl.state is CtrlState.STOPPED
+    assert getattr(ctrl.server, '_thread', None) is None
+
+
+# device hr 0 -> unit 1 hr 5, device hr 1 -> unit 2 hr 5 (target 位址相同、unit 不同)
+UNIT_ROWS = [
+    'modbus_tcp1,127.0.0.1,502,1,hr,0,uint16,5,uint16,,,,,,1,,',
+    'modbus_tcp1,127.0.0.1,502,1,hr,1,uint16,5,uint16,,,,,,2,,',
+]
+
+
+def test_each_unit_id_has_its_own_slave(make_ctrl):
+    ctrl = make_ctrl(UNIT_ROWS)
+    assert not ctrl.context.single
+    assert sorted(ctrl._slave_contexts) == [1, 2]
+
+    unit_1, unit_2 = ctrl.mirror.src_list
+    unit_1.values, unit_2.values = [11], [22]
+    ctrl.WriteContext()
+    assert list(ctrl.context[1].getValues(3, 5, 1)) == [11]
+    assert list(ctrl.context[2].getValues(3, 5, 1)) == [22]
+
+
+def test_unknown_unit_id_is_rejected(make_ctrl):
+    ctrl = make_ctrl(UNIT_ROWS)
+    with pytest.raises(NoSuchSlaveException):
+        ctrl.context[3]
+
+
+def test_server_write_carries_unit_id(make_ctrl, monkeypatch):
+    ctrl = make_ctrl(UNIT_ROWS)
+    written = []
+    monkeypatch.setattr(ctrl, 'WriteMirror', lambda *args: written.append(args))
+    ctrl.context[2].setValues(16, 5, [33])
+    assert written == [(16, 5, [33], 2)]
+    assert list(ctrl.context[2].getValues(3, 5, 1)) == [33]
+    assert list(ctrl.context[1].getValues(3, 5, 1)) == [0]
+
+
+def test_default_unit_id_keeps_single_slave_mode(make_ctrl):
+    ctrl = make_ctrl(['modbus_tcp1,127.0.0.1,502,1,hr,0,uint16,5,uint16,,,,,,,,'], server_sid=1)
+    assert ctrl.mirror.src_list[0].target.unit_id == 1
+    assert ctrl.context.single
+    # single slave mode 下任何 unit id 皆由同一個 slave 回應
+    assert ctrl.context[7] is ctrl._slave_contexts[1]
@@ -0,0 +1,42 @@
+import pytest
+
+from source import DataType, EDataOrder, PointType
+
+VALUES = {
+    'int8': -5, 'uint8': 200, 'int16': -12345, 'uint16': 54321, 'int32': -123456789, 'uint32': 3456789012,
+    'int64': -1234567890123, 'uint64': 12345678901234, 'float16': 1.5, 'float32': 3.25, 'float64': -2.718281828,
+}
+ORDERS = list(EDataOrder)
+
+
+@pytest.mark.parametrize('order', ORDERS, ids=lambda order: order.name)
+@pytest.mark.parametrize('type_str', VALUES)
+def test_struct_codec_matches_payload_builder(type_str, order):
+    """預先編譯的 struct codec 與 pymodbus BinaryPayloadBuilder/Decoder 的結果相同"""
+    data_type = DataType(type_str, PointType('hr'), **order.to_pymodbus)
+    value = VALUES[type_str]
+    registers = data_type._BuilderEncode(value)
+    assert data_type.Encode(value) == registers
+    assert data_type.Decode(registers) == pytest.approx(value)
+    assert data_type.length == len(registers)
+
+
+@pytest.mark.parametrize('order', ORDERS, ids=lambda order: order.name)
+@pytest.mark.parametrize('type_str', ['int16', 'uint32', 'float32', 'float64'])
+def test_many_matches_single(type_str, order):
+    data_type = DataType(type_str, PointType('hr'), **order.to_pymodbus)
+    values = [VALUES[type_str], 0, 7]
+    registers = data_type.EncodeMany(values)
+    assert registers == [reg for value in values for reg in data_type.Encode(value)]
+    assert data_type.DecodeMany(registers) == pytest.approx(values)
+
+    # 依 offsets 解碼不連續排列的數值
+    padded = [0xFFFF] + registers[:data_type.length] + [0xFFFF] + registers[data_type.length:]
+    offsets = [1, 2 + data_type.length, 2 + 2 * data_type.length]
+    assert data_type.DecodeMany(padded, offsets) == pytest.approx(values)
+
+
+def test_bool_codec():
+    assert DataType('bool', PointType('co')).Encode(True) == [True]
+    assert DataType('bool', PointType('hr')).Encode(True) == [0x0100]
+    assert DataType('bool', PointType('hr')).Decode([0x0100]) is True
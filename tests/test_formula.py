@@ -0,0 +1,33 @@
+import pytest
+
+from formula import HAS_NUMPY, AffineBatch, FormulaX
+
+
+@pytest.mark.parametrize('formula_str, affine', [
+    ('3.14*X', (3.14, 0.)),
+    ('X/10+2', (0.1, 2.)),
+    ('-(X-5)*2', (-2., 10.)),
+    ('X*X', None),
+    ('1/X', None),
+])
+def test_affine_coefficients(formula_str, affine):
+    formula = FormulaX.Compile(formula_str)
+    if affine is None:
+        assert not formula.is_affine
+    else:
+        assert formula.affine == pytest.approx(affine)
+
+
+def test_invalid_formula():
+    with pytest.raises(ValueError):
+        FormulaX('__import__("os")')
+
+
+@pytest.mark.skipif(not HAS_NUMPY, reason='numpy is not installed')
+def test_batch_matches_scalar_formulas():
+    formulas = [FormulaX.Compile(formula_str) for formula_str in ['X/10+2', '3.14*X', '2-X']]
+    batch = AffineBatch(['a', 'b', 'c'], formulas)
+    x = [10, -3, 7.5]
+    assert batch.Apply(x) == pytest.approx([formula(val) for formula, val in zip(formulas, x)])
+    # 只有部分 sources 有變動時，rows 指出 x 對應的 sources
+    assert batch.Apply([10, 7.5], [0, 2]) == pytest.approx([formulas[0](10), formulas[2](7.5)])
@@ -0,0 +1,64 @@
+import pytest
+
+from conftest import DEVICE_SIZE
+from mirror_sync import SyncMirror
+from mirror_thread import ThreadMirror
+from source import EDataOrder, HslModbusTcpSource, ModbusTarget, ReadBlock
+
+POINTS = [('hr', 'uint16', 10), ('hr', 'int32', 50), ('ir', 'uint16', 7), ('hr', 'uint16', 120),
+          ('co', 'bool', 3), ('co', 'bool', 4), ('di', 'bool', 9), ('hr', 'uint16', DEVICE_SIZE + 10)]
+
+
+def _sources(port, depth, monkeypatch):
+    monkeypatch.setattr(HslModbusTcpSource, '_default_pipeline_depth', depth)
+    sources = []
+    for i, (point_type, data_type, address) in enumerate(POINTS):
+        target = ModbusTarget(i * 2, 'co' if data_type == 'bool' else 'hr', data_type, EDataOrder.ABCD, addr_start_from=0)
+        sources.append(HslModbusTcpSource('127.0.0.1', port, address, target, point_type_str=point_type,
+                                          data_type_str=data_type, addr_start_from=0, slave_id=1))
+    return sources
+
+
+def _read(mirror_cls, sources, logger):
+    mirror = mirror_cls(sources, logger)
+    mirror.connect_all()
+    mirror.Read()
+    result = [(src.status, src.values) for src in sources]
+    mirror.Disconnect()
+    return result
+
+
+@pytest.mark.parametrize('mirror_cls', [SyncMirror, ThreadMirror])
+def test_pipelined_read_matches_sequential(device, logger, monkeypatch, mirror_cls):
+    port, _ = device
+    sequential = _read(mirror_cls, _sources(port, 1, monkeypatch), logger)
+    pipelined = _read(mirror_cls, _sources(port, 4, monkeypatch), logger)
+    assert pipelined == sequential
+    assert [values for _, values in pipelined[:4]] == [[10], [50, 51], [7], [120]]
+    # 越界的位址只影響自己的區塊
+    assert pipelined[-1][1] is None
+    assert all(status.wait_read for status, _ in pipelined[:-1])
+
+
+def test_pipeline_read_pairs_responses(device, monkeypatch):
+    port, _ = device
+    head, other = _sources(port, 3, monkeypatch)[:2]
+    head.Connect()
+    results = head.PipelineRead([(head, 20, 1), (other, 30, 2), (head, DEVICE_SIZE, 1), (head, 40, 3)])
+    assert [req for req, _ in results] == [1, 1, 0, 1]
+    assert bytes(results[3][1]) == bytes([0, 40, 0, 41, 0, 42])
+
+    blocks = [ReadBlock(head), ReadBlock(other)]
+    assert [req for req, _ in ReadBlock.ReadPipelined(blocks)] == [1, 1]
+    assert (head.values, other.values) == ([10], [50, 51])
+    head.Disconnect()
+
+
+def test_pipeline_disabled_reads_sequentially(device, monkeypatch):
+    port, _ = device
+    src = _sources(port, 1, monkeypatch)[0]
+    assert src.pipeline_key is None
+    src.Connect()
+    results = src.client.ReadPipelined([(src.RequestStr('fx', address=address), 1) for address in range(5)])
+    assert [bytes(res.Content) for res in results] == [bytes([0, address]) for address in range(5)]
+    src.Disconnect()
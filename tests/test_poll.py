@@ -0,0 +1,57 @@
+import pytest
+
+import mirror_sync
+from conftest import make_source
+from mirror_sync import SyncMirror
+from source import PollGroup
+
+PORT = 502
+
+
+@pytest.fixture
+def mirror(logger):
+    # 同一設備上位址相鄰，但輪詢設定不同的 sources
+    sources = [
+        make_source(PORT, 0, 0),                                    # 每次 Read 都讀取
+        make_source(PORT, 1, 1, poll_sec=1.),
+        make_source(PORT, 2, 2, poll_sec=1.),
+        make_source(PORT, 3, 3, poll_sec=5., poll_priority=10),
+    ]
+    mirror = SyncMirror(sources, logger)
+    for src in sources:
+        mirror.src_list.set_connected(src)
+    return mirror
+
+
+def _due(mirror, monkeypatch, now):
+    """於 now 呼叫 _DueBlocks，返回各區塊的 source 位址"""
+    monkeypatch.setattr(mirror_sync, 'monotonic', lambda: now)
+    return [[src.address for src in block] for block in mirror._DueBlocks()]
+
+
+def test_sources_grouped_by_poll_sec_and_priority(mirror):
+    groups = {key: [src.address for src in group] for key, group in mirror.src_list.poll_groups.items()}
+    assert groups == {(None, 0): [0], (1., 0): [1, 2], (5., 10): [3]}
+
+
+def test_only_due_groups_are_planned_by_priority(mirror, monkeypatch):
+    # 第一次 Read 全部到期；priority 高者先讀，位址相鄰但不同群組的 sources 不合併
+    assert _due(mirror, monkeypatch, 100.) == [[3], [0], [1, 2]]
+    # 1 秒後 poll_sec=5 的群組尚未到期
+    assert _due(mirror, monkeypatch, 101.) == [[0], [1, 2]]
+    # 0.5 秒後只有每次都讀的群組到期
+    assert _due(mirror, monkeypatch, 101.5) == [[0]]
+    assert _due(mirror, monkeypatch, 102.) == [[0], [1, 2]]
+    assert _due(mirror, monkeypatch, 105.) == [[3], [0], [1, 2]]
+
+
+def test_group_due_skips_missed_periods():
+    group = PollGroup(poll_sec=1.)
+    assert group.Due(10.)
+    assert not group.Due(10.5)
+    assert group.Due(11.)
+    # 落後多個週期時只讀一次，並以 now 重新對齊
+    assert group.Due(14.2)
+    assert not group.Due(14.9)
+    assert group.Due(15.2)
+    assert group.poll_count == 4
@@ -0,0 +1,59 @@
+import pytest
+
+import scheduler
+from scheduler import FixedRateScheduler
+
+
+class _Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock(100.)
+    monkeypatch.setattr(scheduler, 'monotonic', clock)
+    return clock
+
+
+def test_deadline_advances_by_period_without_drift(clock):
+    sched = FixedRateScheduler(1.)
+    assert sched.Next() == pytest.approx(1.)
+    # 每輪的讀寫耗時不同，截止時間仍固定在 101, 102, 103...
+    for now, delay in [(100.3, 1.7), (102.05, 0.95), (103.9, 0.1)]:
+        clock.now = now
+        assert sched.Next() == pytest.approx(delay)
+        assert not sched.is_overrun
+    assert sched.overrun_count == 0
+
+
+def test_overrun_realigns_without_replaying_missed_periods(clock):
+    sched = FixedRateScheduler(1.)
+    sched.Next()                        # deadline 101
+    clock.now = 102.5                   # 下一個截止時間 102 已過 0.5 秒
+    assert sched.Next() == 0.
+    assert sched.is_overrun
+    assert sched.overrun_count == 1
+    assert sched.last_overrun_sec == pytest.approx(0.5)
+
+    # 以 now 重新對齊，不補跑錯過的週期
+    clock.now = 102.6
+    assert sched.Next() == pytest.approx(0.9)
+    assert not sched.is_overrun
+
+    clock.now = 106.
+    assert sched.Next() == 0.
+    assert sched.overrun_count == 2
+    assert sched.last_overrun_sec == pytest.approx(1.5)
+
+
+def test_reset_restarts_from_now(clock):
+    sched = FixedRateScheduler(0.5)
+    sched.Next()
+    clock.now = 200.
+    sched.Reset()
+    assert sched.Next() == pytest.approx(0.5)
+    assert not sched.is_overrun
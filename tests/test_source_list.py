@@ -0,0 +1,87 @@
+import random
+
+import pytest
+
+from conftest import make_source
+from mirror_sync import SyncMirror
+from source import SourceStatus
+
+# 兩個設備 (不同 client_key)，各 3 個 sources
+PORTS = [502, 503]
+
+
+@pytest.fixture
+def mirror(logger):
+    sources = [make_source(port, i, len(PORTS) * i + j) for j, port in enumerate(PORTS) for i in range(3)]
+    return SyncMirror(sources, logger)
+
+
+def _ids(sources):
+    return sorted(id(src) for src in sources)
+
+
+def _assert_status_index(src_list):
+    """狀態索引與逐一掃描 src_list 的結果相同"""
+    assert _ids(src_list.wait_connect) == _ids(src for src in src_list if src.status.wait_connect)
+    assert _ids(src_list.wait_read) == _ids(src for src in src_list if src.status.wait_read)
+    assert _ids(src_list.wait_retry) == _ids(src for src in src_list if src.status == SourceStatus.CONNECTED_FAILED)
+    assert _ids(src_list.retry_failed) == _ids(src for src in src_list if src.status == SourceStatus.RETRY_FAILED)
+    assert _ids(src_list.read_failed) == _ids(src for src in src_list if src.status == SourceStatus.READING_FAILED)
+
+
+def test_status_index_matches_list_scan(mirror):
+    src_list = mirror.src_list
+    _assert_status_index(src_list)
+
+    transitions = [
+        src_list.set_connected, src_list.set_connect_failed, src_list.set_retry_failed,
+        src_list.set_reading, src_list.set_read_failed, src_list.set_readfail_recover, src_list.reset,
+    ]
+    rand = random.Random(0)
+    for _ in range(200):
+        rand.choice(transitions)(rand.choice(src_list))
+        _assert_status_index(src_list)
+
+
+def _by_client(src_list):
+    groups = {}
+    for src in src_list:
+        groups.setdefault(src.client_key, []).append(src)
+    return groups
+
+
+def test_clients_index_groups_by_client_key(mirror):
+    src_list = mirror.src_list
+    assert {key: _ids(sources) for key, sources in src_list.clients.items()} == \
+        {key: _ids(sources) for key, sources in _by_client(src_list).items()}
+    # 相同 client_key 的 sources 共用同一個 client 物件
+    for sources in src_list.clients.values():
+        assert len({id(src.client) for src in sources}) == 1
+    assert len({id(src.client) for src in src_list}) == len(PORTS)
+    assert len(src_list.client_list) == len(PORTS)
+
+
+@pytest.mark.parametrize('transition, status', [
+    ('set_connected', SourceStatus.CONNECTED),
+    ('set_connect_failed', SourceStatus.CONNECTED_FAILED),
+    ('set_retry_failed', SourceStatus.RETRY_FAILED),
+])
+def test_client_status_propagates_to_same_client_only(mirror, transition, status):
+    src_list = mirror.src_list
+    groups = list(_by_client(src_list).values())
+    getattr(src_list, transition)(groups[0][1])
+
+    assert all(src.status == status for src in groups[0])
+    assert all(src.status == SourceStatus.MIRRORED for src in groups[1])
+    _assert_status_index(src_list)
+
+
+def test_read_failure_stays_on_one_source(mirror):
+    src_list = mirror.src_list
+    for src in src_list:
+        src_list.set_connected(src)
+    failed = src_list[0]
+    src_list.set_read_failed(failed)
+    assert src_list.read_failed == [failed]
+    assert all(src.status == SourceStatus.CONNECTED for src in src_list if src is not failed)
+    _assert_status_index(src_list)
@@ -0,0 +1,53 @@
+import pytest
+
+from source import DataType, PointType
+
+FLOAT32 = DataType('float32', PointType('hr'))
+ROWS = [
+    # device hr 0 (int16) -> target 0 (float32), deadband 1.0
+    'modbus_tcp1,127.0.0.1,502,1,hr,0,int16,0,float32,,,,,,,1.0,',
+    # device hr 1 (uint16) -> target 2 (uint16)
+    'modbus_tcp1,127.0.0.1,502,1,hr,1,uint16,2,uint16,,,,,,,,',
+    # device hr 2 (int16) -> target 4 (float32), X/10 with 10% deadband
+    'modbus_tcp1,127.0.0.1,502,1,hr,2,int16,4,float32,X/10,,,,,,,10',
+]
+
+
+@pytest.fixture(params=[True, False], ids=['vectorize', 'scalar'])
+def ctrl(request, make_ctrl):
+    return make_ctrl(ROWS, formula_vectorize=request.param)
+
+
+def _cycle(ctrl, *values):
+    for src, value in zip(ctrl.mirror.src_list, values):
+        src.values = None if value is None else [value & 0xFFFF]
+    ctrl.WriteContext()
+    slave = ctrl._slave_contexts[0]
+    registers = list(slave.getValues(3, 0, 6))
+    return FLOAT32.Decode(registers[0:2]), registers[2], FLOAT32.Decode(registers[4:6])
+
+
+def test_unchanged_sources_are_skipped(ctrl):
+    assert _cycle(ctrl, 10, 20, 300) == (10., 20, pytest.approx(30.))
+    assert ctrl.context_stats == dict(updated=3, skipped=0, deadband=0)
+    assert _cycle(ctrl, 10, 21, 300) == (10., 21, pytest.approx(30.))
+    assert ctrl.context_stats == dict(updated=1, skipped=2, deadband=0)
+
+
+def test_deadband_keeps_last_value(ctrl):
+    _cycle(ctrl, 10, 20, 300)
+    # |11-10| <= 1.0 與 |31-30| <= 30*10% 皆在 deadband 內，保留上次的數值
+    assert _cycle(ctrl, 11, 20, 310) == (10., 20, pytest.approx(30.))
+    assert ctrl.context_stats == dict(updated=0, skipped=1, deadband=2)
+    assert _cycle(ctrl, 12, 20, 340) == (12., 20, pytest.approx(34.))
+    assert ctrl.context_stats == dict(updated=2, skipped=1, deadband=0)
+
+
+def test_read_failure_writes_null_value(ctrl):
+    _cycle(ctrl, 10, 20, 300)
+    _cycle(ctrl, None, 20, None)
+    assert ctrl.context_stats == dict(updated=2, skipped=1, deadband=0)
+    null = DataType('int16', PointType('hr')).Encode(ctrl.config.server_null_value)
+    assert list(ctrl._slave_contexts[0].getValues(3, 0, 1)) == null
+    # 恢復讀取後不受 deadband 影響，立即寫入
+    assert _cycle(ctrl, 10, 20, 300) == (10., 20, pytest.approx(30.))
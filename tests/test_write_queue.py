@@ -0,0 +1,52 @@
+import threading
+
+from write_queue import WriteQueue
+
+
+class _Mirror:
+    """記錄寫入順序的 mirror，第一筆寫入會等待 release 後才完成"""
+    def __init__(self):
+        self.written = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def _MatchSourceList(self, fx, address, unit_id=0x00):
+        return []
+
+    def Write(self, fx, address, values, unit_id=0x00):
+        self.started.set()
+        self.release.wait(timeout=5.)
+        self.written.append((address, values))
+        return 1
+
+
+def test_coalesced_write_keeps_latest_order(logger):
+    mirror = _Mirror()
+    queue = WriteQueue(mirror, logger)
+    queue.Put(16, 0, [0])
+    assert mirror.started.wait(timeout=5.)
+
+    queue.Put(16, 1, [11])
+    queue.Put(16, 2, [20])
+    queue.Put(16, 1, [12])
+    assert queue.depth == 2
+    mirror.release.set()
+    queue.Close(wait=True)
+
+    assert mirror.written == [(0, [0]), (2, [20]), (1, [12])]
+    assert queue.stats['coalesced'] == 1
+    assert queue.stats['put'] == 4
+    assert queue.latency.count == 3
+
+
+def test_put_after_close_is_dropped(logger, caplog):
+    mirror = _Mirror()
+    mirror.release.set()
+    queue = WriteQueue(mirror, logger)
+    queue.Put(16, 0, [1])
+    queue.Close(wait=True)
+
+    queue.Put(16, 0, [2])
+    assert mirror.written == [(0, [1])]
+    assert queue.stats['failed'] == 1
+    assert 'write dropped' in caplog.text
@@ -0,0 +1,103 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from time import perf_counter
+
+from cycle_stats import CycleStats
+
+
+class WriteQueue:
+    """server 寫入請求的非同步佇列：
+        - Put() 只負責排入佇列即返回，server 不必等待設備回應
+        - 每個設備 (client_key) 各自一個 writer thread 依序寫出
+        - 尚未寫出的請求中，相同 (unit_id, fx, address, 長度) 者只保留最新的一筆 (移至佇列尾端)
+        - Close() 之後的寫入請求記錄後捨棄
+    """
+    def __init__(self, mirror, logger):
+        self.mirror = mirror
+        self.logger = logger
+        self._lock = Lock()
+        self._pending = {}      # device_key -> {(unit_id, fx, address, len): (values, enqueue_time)}
+        self._workers = {}
+        self._draining = set()
+        self._closed = False
+        self.put_count = 0
+        self.coalesced_count = 0
+        self.failed_count = 0
+        self.latency = CycleStats()
+
+    def __repr__(self):
+        return f'<{__class__.__name__} depth={self.depth} latency={self.latency}>'
+
+    @property
+    def depth(self):
+        with self._lock:
+            return sum(len(pending) for pending in self._pending.values())
+
+    @property
+    def stats(self):
+        return dict(
+            depth=self.depth,
+            put=self.put_count,
+            coalesced=self.coalesced_count,
+            failed=self.failed_count,
+            latency=self.latency.dict,
+        )
+
+    def _DeviceKey(self, fx, address, unit_id):
+        matched_src_list = self.mirror._MatchSourceList(fx, address, unit_id)
+        return matched_src_list[0].client_key if matched_src_list else None
+
+    def Put(self, fx, address, values, unit_id=0x00):
+        device_key = self._DeviceKey(fx, address, unit_id)
+        req_key = (unit_id, fx, address, len(values))
+        with self._lock:
+            if self._closed:
+                self.logger.warning(f'(Write-Queue) closed, write dropped unit={unit_id} fx={fx} address={address}')
+                self.failed_count += 1
+                return
+
+            pending = self._pending.setdefault(device_key, {})
+            if req_key in pending:
+                # 以新值取代尚未寫出的舊值並移至尾端，不會超前期間排入的其他寫入；
+                # 延遲仍由最早排入的時間起算
+                _, enqueue_time = pending.pop(req_key)
+                pending[req_key] = (list(values), enqueue_time)
+                self.coalesced_count += 1
+            else:
+                pending[req_key] = (list(values), perf_counter())
+            self.put_count += 1
+
+            if device_key not in self._draining:
+                self._draining.add(device_key)
+                self._Worker(device_key).submit(self._Drain, device_key)
+
+    def _Worker(self, device_key):
+        if device_key not in self._workers:
+            self._workers[device_key] = ThreadPoolExecutor(max_workers=1, thread_name_prefix='WriteQueue')
+        return self._workers[device_key]
+
+    def _Drain(self, device_key):
+        while True:
+            with self._lock:
+                pending = self._pending.pop(device_key, None)
+                if not pending:
+                    self._draining.discard(device_key)
+                    return
+
+            for (unit_id, fx, address, _), (values, enqueue_time) in pending.items():
+                try:
+                    req = self.mirror.Write(fx, address, values, unit_id)
+                except Exception as e:
+                    self.logger.error(f'(Write-Queue) write failed unit={unit_id} fx={fx} address={address} {e}')
+                    req = 0
+                with self._lock:
+                    if not req:
+                        self.failed_count += 1
+                    self.latency.update(perf_counter() - enqueue_time)
+
+    def Close(self, wait=True):
+        """停止接受新的寫入請求，wait=True 時等待佇列中的請求寫完"""
+        with self._lock:
+            self._closed = True
+        for worker in list(self._workers.values()):
+            worker.shutdown(wait=wait)